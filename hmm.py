@@ -1,6 +1,11 @@
 from __future__ import division
+import itertools
+import json
+import os
 from collections import defaultdict
 
+import numpy as np
+
 class HMM:
     def __init__(self):
         self.PI = {}
@@ -86,10 +91,541 @@ class HMM:
         # print "\tTransition probabilities: {0}".format(self.A)
         # print "\tEmission probabilities: {0}".format(self.B)
 
+
+class ArrayHMM:
+    '''HMM over integer-encoded tags (hidden states) and words (observations)
+
+    Parameters are dense NumPy arrays of log-probabilities, so scoring never underflows.
+
+    Attributes:
+        tags ([string]): tag of each tag id
+        tag_ids (dict<string, int>): id of each tag
+        words ([string]): word of each word id; id 0 is UNKNOWN
+        word_ids (dict<string, int>): id of each word
+        PI (np.array): PI[t] is the log-probability of starting a sentence with tag t
+        A (np.array): A[t, u] is the log-probability of tag u following tag t
+        B (np.array): B[t, w] is the log-probability of tag t emitting word w
+        counts (HMMCounts): counts the parameters were estimated from, None for a loaded model
+    '''
+
+    UNKNOWN = u'<unk>'
+    VERSION = 1     # version of the format written by save()
+
+    def __init__(self):
+        self.tags = []
+        self.tag_ids = {}
+        self.words = [self.UNKNOWN]
+        self.word_ids = {self.UNKNOWN: 0}
+        self.PI = np.zeros(0)
+        self.A = np.zeros((0, 0))
+        self.B = np.zeros((0, 1))
+        self.counts = HMMCounts()
+
+    def encode(self, words):
+        '''Returns the array of ids of `words`, unknown words being mapped to UNKNOWN'''
+        return np.array([self.word_ids.get(w, 0) for w in words], dtype=np.int32)
+
+    def prob_sequence(self, Q, O):
+        '''Returns the log-probability of the tags `Q` emitting the words `O`
+
+        Unknown words are uninformative: every tag emits them with log-probability 0.
+        '''
+        q = np.array([self.tag_ids[t] for t in Q], dtype=np.int32)
+        o = self.encode(O)
+
+        return self.PI[q[0]] + self.A[q[:-1], q[1:]].sum() + self.B[q, o].sum()
+
+    def forward(self, words):
+        '''Returns the log-probability of the words `words` summed over all tag sequences (forward algorithm)'''
+        o = self.encode(words)
+        if not len(o):
+            return 0.0
+
+        alpha = self.PI + self.B[:, o[0]]
+        for w in o[1:]:
+            alpha = logsumexp(alpha[:, np.newaxis] + self.A, axis=0) + self.B[:, w]
+
+        return logsumexp(alpha, axis=0)
+
+    def viterbi(self, words):
+        '''Returns the tuple (log-probability, tags) of the most probable tag sequence for the words `words`'''
+        o = self.encode(words)
+        if not len(o):
+            return 0.0, []
+
+        T = len(self.tags)
+        backpointers = np.zeros((len(o), T), dtype=np.int32)
+        delta = self.PI + self.B[:, o[0]]
+        for t in xrange(1, len(o)):
+            scores = delta[:, np.newaxis] + self.A
+            backpointers[t] = scores.argmax(axis=0)
+            delta = scores[backpointers[t], np.arange(T)] + self.B[:, o[t]]
+
+        path = [delta.argmax()]
+        for t in xrange(len(o) - 1, 0, -1):
+            path.append(backpointers[t, path[-1]])
+
+        return delta.max(), [self.tags[q] for q in reversed(path)]
+
+    def tag_many(self, sentences, batch_size=256):
+        '''Returns the most probable tags of every sentence of words in `sentences`
+
+        Sentences are sorted by length and decoded `batch_size` at a time, padded to the longest of their batch,
+        with one Viterbi step per position for the whole batch.
+        '''
+        sentences = list(sentences)
+        order = sorted(xrange(len(sentences)), key=lambda k: len(sentences[k]))
+
+        tags = [None] * len(sentences)
+        for start in xrange(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            for k, path in zip(batch, self._viterbi_batch([sentences[k] for k in batch])):
+                tags[k] = [self.tags[q] for q in path]
+
+        return tags
+
+    def _viterbi_batch(self, sentences):
+        '''Returns the most probable tag id sequences of `sentences`, decoded together'''
+        S, T = len(sentences), len(self.tags)
+        lengths = np.array([len(sentence) for sentence in sentences])
+        N = lengths.max() if S else 0
+
+        o = np.zeros((S, N), dtype=np.int32)     # padded with UNKNOWN
+        for k, sentence in enumerate(sentences):
+            o[k, :len(sentence)] = self.encode(sentence)
+
+        backpointers = np.zeros((S, N, T), dtype=np.int32)
+        delta = self.PI + self.B[:, o[:, 0]].T if N else np.zeros((S, T))
+        for t in xrange(1, N):
+            scores = delta[:, :, np.newaxis] + self.A
+            backpointers[:, t] = scores.argmax(axis=1)
+            step = np.take_along_axis(scores, backpointers[:, t][:, np.newaxis], axis=1)[:, 0] + self.B[:, o[:, t]].T
+            delta = np.where((t < lengths)[:, np.newaxis], step, delta)     # finished sentences keep their scores
+
+        # follow the backpointers of each sentence from its own last position
+        paths = np.zeros((S, N), dtype=np.int32)
+        current = delta.argmax(axis=1)
+        rows = np.arange(S)
+        for t in xrange(N - 1, -1, -1):
+            active = t < lengths
+            paths[active, t] = current[active]
+            current = np.where(active, backpointers[rows, t, current], current)
+
+        return [paths[k, :lengths[k]] for k in xrange(S)]
+
+    def train(self, data):
+        '''Trains the HMM using text
+
+        @param data([[(String, String)]]): Iterable of list of tuple `(word, pos-tag)`, see HMM.train
+        '''
+        self.fit_counts(HMMCounts().update(data))
+
+    def partial_fit(self, data):
+        '''Adds the counts of the tagged sentences `data` to those the HMM was trained on and re-estimates it
+
+        :raises ValueError: if the HMM was loaded, since its counts are not saved
+        '''
+        if self.counts is None:
+            raise ValueError("A loaded HMM has no counts to update, train it or call fit_counts() instead")
+        self.fit_counts(self.counts.update(data))
+
+    def fit_counts(self, counts):
+        '''Estimates the HMM from the HMMCounts `counts`, e.g. merged from counts of several shards'''
+        self.counts = counts
+        self.tags, self.tag_ids = counts.tags, counts.tag_ids
+        self.words, self.word_ids = counts.words, counts.word_ids
+        self._estimate(counts)
+
+    def save(self, path):
+        '''Saves the HMM to the directory `path`: one .npy file per parameter and the vocabularies in model.json'''
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        for name in ('PI', 'A', 'B'):
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+        with open(os.path.join(path, 'model.json'), 'w') as f:
+            json.dump({'version': self.VERSION, 'tags': self.tags, 'words': self.words}, f)
+
+    @classmethod
+    def load(cls, path):
+        '''Loads a HMM saved by save() from the directory `path`
+
+        Parameters are memory-mapped read-only, so processes loading the same model share its pages.
+        :raises ValueError: if the model was saved in another version of the format
+        '''
+        with open(os.path.join(path, 'model.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != cls.VERSION:
+            raise ValueError("HMM model {0} has version {1}, expected {2}".format(path, meta.get('version'), cls.VERSION))
+
+        hmm = cls()
+        hmm.tags, hmm.words = meta['tags'], meta['words']
+        hmm.tag_ids = dict((t, i) for i, t in enumerate(hmm.tags))
+        hmm.word_ids = dict((w, i) for i, w in enumerate(hmm.words))
+        for name in ('PI', 'A', 'B'):
+            setattr(hmm, name, np.load(os.path.join(path, name + '.npy'), mmap_mode='r'))
+        hmm.counts = None
+
+        return hmm
+
+    def _estimate(self, counts):
+        '''Sets the log-probabilities PI, A and B from the HMMCounts `counts` (MLE)'''
+        pi, a = counts.pi, counts.a
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.PI = np.log(pi / max(pi.sum(), 1))
+            self.A = np.log(a / np.maximum(a.sum(axis=1), 1)[:, np.newaxis])
+
+        # B is filled from the pairs seen, so it is the only array as large as tags x words
+        words, tags = counts.emissions // counts.BASE, counts.emissions % counts.BASE
+        totals = np.bincount(tags, counts.emission_counts, minlength=len(self.tags))
+        self.B = np.full((len(self.tags), len(self.words)), -np.inf)
+        self.B[tags, words] = np.log(counts.emission_counts / totals[tags])
+        self.B[:, 0] = 0.0
+
+
+class HMMCounts:
+    '''Counts of initial tags, tag bigrams and (tag, word) pairs of a tagged corpus
+
+    Sentences are read from any iterator `chunk_size` at a time, so only the counts are kept in memory.
+    (tag, word) pairs are counted sparsely: the counts grow with the pairs seen, not with tags x words.
+    Counts of separate shards can be merged.
+
+    Attributes:
+        tags ([string]): tag of each tag id
+        tag_ids (dict<string, int>): id of each tag
+        words ([string]): word of each word id; id 0 is ArrayHMM.UNKNOWN
+        word_ids (dict<string, int>): id of each word
+        pi (np.array): pi[t] is the number of sentences starting with tag t
+        a (np.array): a[t, u] is the number of times tag u follows tag t
+        emissions (np.array): sorted keys w * BASE + t of the pairs (tag t, word w) seen
+        emission_counts (np.array): number of times each pair of `emissions` was seen
+    '''
+
+    BASE = 1 << 20
+
+    def __init__(self):
+        self.tags = []
+        self.tag_ids = {}
+        self.words = [ArrayHMM.UNKNOWN]
+        self.word_ids = {ArrayHMM.UNKNOWN: 0}
+        self.pi = np.zeros(0, dtype=np.int64)
+        self.a = np.zeros((0, 0), dtype=np.int64)
+        self.emissions = np.zeros(0, dtype=np.int64)
+        self.emission_counts = np.zeros(0, dtype=np.int64)
+
+    def update(self, data, chunk_size=10000):
+        '''Adds the counts of the tagged sentences `data`, see HMM.train
+
+        :param chunk_size: number of sentences encoded and counted at once
+        :return: self
+        '''
+        data = iter(data)
+        while True:
+            chunk = list(itertools.islice(data, chunk_size))
+            if not chunk:
+                return self
+
+            tags, words, starts = self._encode(chunk)
+            self._grow()
+            if len(tags):
+                self._count(tags, words, starts)
+
+    def merge(self, other):
+        '''Adds the counts of the HMMCounts `other`, whose ids are mapped onto the ids of this table
+
+        :return: self
+        '''
+        tag_map = np.array([self._tag_id(t) for t in other.tags], dtype=np.int64)
+        word_map = np.array([self._word_id(w) for w in other.words], dtype=np.int64)
+        self._grow()
+
+        np.add.at(self.pi, tag_map, other.pi)
+        np.add.at(self.a, (tag_map[:, np.newaxis], tag_map), other.a)
+        keys = word_map[other.emissions // self.BASE] * self.BASE + tag_map[other.emissions % self.BASE]
+        self.emissions, self.emission_counts = _add_keys(self.emissions, self.emission_counts, keys, other.emission_counts)
+        return self
+
+    def emission_matrix(self):
+        '''Returns the dense array b where b[t, w] is the number of times tag t tags word w'''
+        b = np.zeros((len(self.tags), len(self.words)), dtype=np.int64)
+        b[self.emissions % self.BASE, self.emissions // self.BASE] = self.emission_counts
+        return b
+
+    def _tag_id(self, tag):
+        if tag not in self.tag_ids:
+            self.tag_ids[tag] = len(self.tags)
+            self.tags.append(tag)
+        return self.tag_ids[tag]
+
+    def _word_id(self, word):
+        if word not in self.word_ids:
+            self.word_ids[word] = len(self.words)
+            self.words.append(word)
+        return self.word_ids[word]
+
+    def _encode(self, data):
+        '''Encodes the sentences of `data`, growing the vocabularies
+
+        :return: (tag ids, word ids, index of the first token of each sentence)
+        '''
+        tags, words, starts = [], [], []
+        for sentence in data:
+            if not sentence:
+                continue
+            starts.append(len(tags))
+            for word, tag in sentence:
+                tags.append(self._tag_id(tag))
+                words.append(self._word_id(word))
+
+        return np.array(tags, dtype=np.int64), np.array(words, dtype=np.int64), np.array(starts, dtype=np.int64)
+
+    def _grow(self):
+        '''Pads the tag count arrays with zeros up to the number of tags'''
+        T = len(self.tags)
+        if len(self.pi) != T:
+            pi, a = self.pi, self.a
+            self.pi = np.zeros(T, dtype=np.int64)
+            self.a = np.zeros((T, T), dtype=np.int64)
+            self.pi[:len(pi)] = pi
+            self.a[:a.shape[0], :a.shape[1]] = a
+
+    def _count(self, tags, words, starts):
+        '''Adds the counts of encoded sentences'''
+        T = len(self.tags)
+
+        # bigrams never cross a sentence boundary
+        within = np.ones(len(tags), dtype=bool)
+        within[starts - 1] = False
+        within = within[:-1]
+
+        self.pi += np.bincount(tags[starts], minlength=T)
+        self.a += np.bincount(tags[:-1][within] * T + tags[1:][within], minlength=T * T).reshape(T, T)
+        keys, counts = np.unique(words * self.BASE + tags, return_counts=True)
+        self.emissions, self.emission_counts = _add_keys(self.emissions, self.emission_counts, keys, counts)
+
+
+class TrigramCounts(HMMCounts):
+    '''HMMCounts along with the counts of tag trigrams, see TrigramHMM
+
+    A trigram (t1, t2, t3) is stored as the key ((t1 + 1) * BASE + t2 + 1) * BASE + t3 + 1, where 0 stands for
+    the beginning of the sentence, so the first tags of a sentence have the contexts (BOS, BOS) and (BOS, t1).
+
+    Attributes:
+        trigrams (np.array): sorted keys of the trigrams seen
+        trigram_counts (np.array): number of times each trigram of `trigrams` was seen
+    '''
+
+    def __init__(self):
+        HMMCounts.__init__(self)
+        self.trigrams = np.zeros(0, dtype=np.int64)
+        self.trigram_counts = np.zeros(0, dtype=np.int64)
+
+    def merge(self, other):
+        HMMCounts.merge(self, other)
+
+        shift = np.array([0] + [self.tag_ids[t] + 1 for t in other.tags], dtype=np.int64)
+        keys = other.trigrams
+        keys = (shift[keys // self.BASE ** 2] * self.BASE + shift[keys // self.BASE % self.BASE]) * self.BASE + shift[keys % self.BASE]
+        self.trigrams, self.trigram_counts = _add_keys(self.trigrams, self.trigram_counts, keys, other.trigram_counts)
+        return self
+
+    def _count(self, tags, words, starts):
+        HMMCounts._count(self, tags, words, starts)
+
+        # offset of each token in its sentence
+        first = np.zeros(len(tags), dtype=np.int64)
+        first[starts] = starts
+        offset = np.arange(len(tags)) - np.maximum.accumulate(first)
+
+        context = np.concatenate(([0, 0], tags + 1))
+        t1 = np.where(offset >= 2, context[:-2], 0)
+        t2 = np.where(offset >= 1, context[1:-1], 0)
+        keys, counts = np.unique((t1 * self.BASE + t2) * self.BASE + tags + 1, return_counts=True)
+        self.trigrams, self.trigram_counts = _add_keys(self.trigrams, self.trigram_counts, keys, counts)
+
+
+class TrigramHMM:
+    '''Second-order HMM tagger in the style of TnT (Brants, 2000. TnT - A Statistical Part-of-Speech Tagger)
+
+    Transitions interpolate unigram, bigram and trigram estimates with weights found by deleted interpolation.
+    Unknown words are tagged from the distribution of tags over rare words sharing their longest suffix,
+    smoothed by successive abstraction over shorter suffixes. Decoding is a beam search over tag pairs and only
+    considers, for a known word, the tags it was seen with.
+
+    Attributes:
+        tags ([string]): tag of each tag id; context id 0 is the beginning of the sentence, c + 1 is tag c
+        words, word_ids: vocabulary, see ArrayHMM
+        lambdas (np.array): weights of the unigram, bigram and trigram estimates
+        theta (float): weight of the shorter suffix when smoothing suffix estimates
+        beam (float): log-probability below the best state under which states are pruned
+    '''
+
+    RARE = 10       # words seen at most RARE times train the suffix model
+    SUFFIX = 10     # longest suffix used for unknown words
+
+    def __init__(self, beam=np.log(1000)):
+        self.beam = beam
+        self.counts = TrigramCounts()
+
+    def train(self, data):
+        '''Trains the HMM using text, see ArrayHMM.train'''
+        self.fit_counts(TrigramCounts().update(data))
+
+    def partial_fit(self, data):
+        '''Adds the tagged sentences `data` to those the HMM was trained on and re-estimates it'''
+        self.fit_counts(self.counts.update(data))
+
+    def fit_counts(self, counts):
+        '''Estimates the HMM from the TrigramCounts `counts`'''
+        self.counts = counts
+        self.tags, self.tag_ids = counts.tags, counts.tag_ids
+        self.words, self.word_ids = counts.words, counts.word_ids
+        T, base = len(self.tags), counts.BASE
+
+        # unigrams, and bigrams whose context is a tag or the beginning of the sentence
+        words, tags = counts.emissions // base, counts.emissions % base
+        unigrams = np.bincount(tags, counts.emission_counts, minlength=T)
+        bigrams = np.vstack((counts.pi, counts.a)).astype(float)
+        self.P1 = unigrams / unigrams.sum()
+        with np.errstate(invalid='ignore'):
+            self.P2 = np.nan_to_num(bigrams / bigrams.sum(axis=1)[:, np.newaxis])
+
+        # trigrams, by context (t1, t2)
+        self.contexts, self.trigram_tags = counts.trigrams // base, counts.trigrams % base - 1
+        f123 = counts.trigram_counts.astype(float)
+        _, inverse = np.unique(self.contexts, return_inverse=True)
+        f12 = np.bincount(inverse, f123)[inverse]
+        self.P3 = f123 / f12
+
+        # deleted interpolation: each trigram votes for the estimate that best predicts it once removed
+        t2, t3 = self.contexts % base, self.trigram_tags
+        f23, f2 = bigrams[t2, t3], bigrams.sum(axis=1)[t2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            estimates = np.vstack((
+                (unigrams[t3] - 1) / (unigrams.sum() - 1),
+                np.where(f2 > 1, (f23 - 1) / (f2 - 1), 0),
+                np.where(f12 > 1, (f123 - 1) / (f12 - 1), 0)))
+        self.lambdas = np.bincount(np.nan_to_num(estimates).argmax(axis=0), f123, minlength=3)
+        self.lambdas /= max(self.lambdas.sum(), 1)
+
+        # emissions of known words, by word
+        self.lexicon_tags = tags.astype(np.int32)
+        self.lexicon = np.log(counts.emission_counts / unigrams[tags])
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(words, minlength=len(self.words)))))
+
+        # tag counts of the rare words sharing each (capitalization, suffix) key, as sparse rows by key id
+        frequencies = np.bincount(words, counts.emission_counts, minlength=len(self.words))
+        self.suffix_ids = {}
+        key_ids, pairs = [], []
+        for w in np.nonzero((frequencies > 0) & (frequencies <= self.RARE))[0]:
+            word, lo, hi = self.words[w], self.offsets[w], self.offsets[w + 1]
+            for i in xrange(1, min(len(word), self.SUFFIX) + 1):
+                key = self.suffix_ids.setdefault((word[:1].isupper(), word[-i:]), len(self.suffix_ids))
+                key_ids += [key] * (hi - lo)
+                pairs += range(lo, hi)
+        pairs = np.array(pairs, dtype=np.int64)
+        keys, inverse = np.unique(np.array(key_ids, dtype=np.int64) * T + self.lexicon_tags[pairs], return_inverse=True)
+        self.suffix_tags = (keys % T).astype(np.int32)
+        self.suffix_counts = np.bincount(inverse, counts.emission_counts[pairs]) if len(pairs) else np.zeros(0)
+        self.suffix_offsets = np.searchsorted(keys // T, np.arange(len(self.suffix_ids) + 1))
+        self.theta = self.P1.std(ddof=1) if T > 1 else 0.0
+
+        self._transitions = {}
+        self._unknown = {}
+
+    def viterbi(self, words):
+        '''Returns the tuple (log-probability, tags) of the most probable tag sequence found for the words `words`'''
+        if not words:
+            return 0.0, []
+
+        T = len(self.tags)
+        t1, t2, scores = np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), np.zeros(1)
+        backpointers = []
+        for word in words:
+            candidates, emissions = self._emissions(word)
+            transitions = np.vstack([self._transition(a, b) for a, b in zip(t1, t2)])[:, candidates]
+            total = (scores[:, np.newaxis] + transitions + emissions).ravel()
+
+            # keep the best state for each new tag pair (t2, candidate), then the states within the beam
+            keys = (t2[:, np.newaxis] * (T + 1) + candidates + 1).ravel()
+            order = np.lexsort((-total, keys))
+            best = np.ones(len(order), dtype=bool)
+            best[1:] = keys[order][1:] != keys[order][:-1]
+            index = order[best]
+            index = index[total[index] >= total[index].max() - self.beam]
+
+            previous = index // len(candidates)
+            t1, t2, scores = t2[previous], candidates[index % len(candidates)] + 1, total[index]
+            backpointers.append((previous, t2))
+
+        state = scores.argmax()
+        path = []
+        for previous, tags in reversed(backpointers):
+            path.append(self.tags[tags[state] - 1])
+            state = previous[state]
+
+        return scores.max(), path[::-1]
+
+    def tag_many(self, sentences):
+        '''Returns the most probable tags found for every sentence of words in `sentences`'''
+        return [self.viterbi(sentence)[1] for sentence in sentences]
+
+    def _transition(self, t1, t2):
+        '''Returns the log-probabilities of every tag following the context ids t1 t2'''
+        key = (t1, t2)
+        if key not in self._transitions:
+            context = t1 * self.counts.BASE + t2
+            lo, hi = np.searchsorted(self.contexts, [context, context + 1])
+            trigrams = np.zeros(len(self.tags))
+            trigrams[self.trigram_tags[lo:hi]] = self.P3[lo:hi]
+
+            l1, l2, l3 = self.lambdas
+            with np.errstate(divide='ignore'):
+                self._transitions[key] = np.log(l1 * self.P1 + l2 * self.P2[t2] + l3 * trigrams)
+        return self._transitions[key]
+
+    def _emissions(self, word):
+        '''Returns the candidate tag ids of `word` and their log emission probabilities'''
+        w = self.word_ids.get(word, 0)
+        if w:
+            lo, hi = self.offsets[w], self.offsets[w + 1]
+            return self.lexicon_tags[lo:hi], self.lexicon[lo:hi]
+
+        if word not in self._unknown:
+            # P(t | suffix) smoothed from the shortest suffix up; P(word | t) is proportional to P(t | suffix) / P(t)
+            probabilities = self.P1
+            for i in xrange(1, min(len(word), self.SUFFIX) + 1):
+                key = self.suffix_ids.get((word[:1].isupper(), word[-i:]))
+                if key is None:
+                    break
+                lo, hi = self.suffix_offsets[key], self.suffix_offsets[key + 1]
+                counts = np.zeros(len(self.tags))
+                counts[self.suffix_tags[lo:hi]] = self.suffix_counts[lo:hi]
+                probabilities = (counts / counts.sum() + self.theta * probabilities) / (1 + self.theta)
+
+            candidates = np.nonzero(probabilities)[0]
+            self._unknown[word] = candidates, np.log(probabilities[candidates] / self.P1[candidates])
+        return self._unknown[word]
+
+
+def _add_keys(keys, counts, new_keys, new_counts):
+    '''Returns the sorted keys and the counts of `keys` and `new_keys` counted `counts` and `new_counts` times'''
+    keys, inverse = np.unique(np.concatenate((keys, new_keys)), return_inverse=True)
+    return keys, np.bincount(inverse, np.concatenate((counts, new_counts))).astype(np.int64)
+
+
+def logsumexp(a, axis):
+    '''Returns log(sum(exp(a))) along `axis`, computed without underflow'''
+    m = np.max(a, axis=axis, keepdims=True)
+    m[~np.isfinite(m)] = 0.0
+    with np.errstate(divide='ignore'):
+        return np.log(np.sum(np.exp(a - m), axis=axis)) + np.squeeze(m, axis=axis)
+
+
 if __name__ == "__main__":
     import nltk
     from nltk.corpus import brown
-    brown_train = list(brown.tagged_sents(categories='news'))
+    brown_train = brown.tagged_sents(categories='news')
 
     hmm = HMM()
     hmm.train(brown_train)
@@ -99,3 +635,14 @@ if __name__ == "__main__":
 
     tmp = zip(*test)
     print hmm.prob_sequence(tmp[0],tmp[1])
+
+    array_hmm = ArrayHMM()
+    array_hmm.train(brown_train)
+    array_hmm.partial_fit(brown.tagged_sents(categories='editorial'))
+    print array_hmm.prob_sequence(tmp[1], tmp[0])
+    print array_hmm.viterbi(tmp[0])
+    print array_hmm.tag_many([tmp[0], tmp[0][:5]])
+
+    trigram_hmm = TrigramHMM()
+    trigram_hmm.train(brown_train)
+    print trigram_hmm.viterbi(tmp[0])
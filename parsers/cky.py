@@ -1,5 +1,9 @@
 #!/usr/bin/python
 
+import numpy as np
+
+from utilities import batch
+from utilities.forest import Forest
 from utilities.grammar import Grammar
 
 class CKY:
@@ -42,6 +46,17 @@ class CKY:
                                     table[i][j] = table[i][j] | set([Component(y, (b, c)) for y in x])
         return table
 
+    def parse_sentence(self, words):
+        '''Returns the list of parses of `words`'''
+        return self.all(self.parse(words))
+
+    def parse_many(self, sentences, workers=None, chunksize=64, max_in_flight=None):
+        '''Parses every list of words of `sentences`, optionally over a pool of `workers` processes
+
+        :return: generator of the lists of parses in input order, see batch.parse_many
+        '''
+        return batch.parse_many(self, sentences, workers, chunksize, max_in_flight)
+
     def all(self, table):
         '''Returns a list of parses'''
         parses = []
@@ -60,6 +75,35 @@ class CKY:
 
         return '({0} {1} {2})'.format(component.tag, self.retrieve_all(component.origin[0]), self.retrieve_all(component.origin[1]))
 
+    def forest(self, table, words):
+        '''Returns the shared packed parse forest (utilities.forest.Forest) of `table` filled by parsing `words`'''
+        forest = Forest()
+
+        position = {}
+        for i in xrange(len(words)):
+            for j in xrange(i, len(words)):
+                for component in table[i][j]:
+                    position[component] = (i, j)
+
+        nodes = {}
+
+        def build(component):
+            if component not in nodes:
+                i, j = position[component]
+                node = nodes[component] = forest.node(component.tag, i, j+1)
+                if component.is_terminal():
+                    node.add((words[i],))
+                else:
+                    node.add(tuple(build(c) for c in component.origin))
+            return nodes[component]
+
+        if words:
+            for component in table[0][-1]:
+                if component.is_S():
+                    forest.root = build(component)
+
+        return forest
+
 
 class Component:
     '''Represents a component constituent'''
@@ -82,39 +126,327 @@ class Component:
     def __repr__(self):
         return "{0}".format(self.tag)
 
+
+class ArrayCKY(CKY):
+    """CKY Parser over integer-encoded nonterminals
+
+    Each cell of the chart is a boolean vector indexed by the ids of `grammar.symbols` and the binary
+    rules are stored as parallel arrays, so combining two cells is a single vectorized lookup.
+
+    Attributes:
+        rule_lhs (np.array<int>): id of A for every binary rule A -> B C
+        rule_b (np.array<int>): id of B for every binary rule A -> B C
+        rule_c (np.array<int>): id of C for every binary rule A -> B C
+        start (int): id of the start symbol `S` or None
+    """
+
+    def __init__(self, grammar):
+        '''Initializes an array-backed CKY Parser
+        :param grammar: utilities.grammar.Grammar object - must be in CNF
+        '''
+        CKY.__init__(self, grammar)
+
+        ids = grammar.symbol_id
+        rules = [(ids[l], ids[r[0]], ids[r[1]]) for l in grammar.symbols for r in grammar.get(l)
+                 if len(r) == 2 and r[0] in ids and r[1] in ids]
+        lhs, b, c = zip(*rules) if rules else ((), (), ())
+
+        self.rule_lhs = np.array(lhs, dtype=np.int32)
+        self.rule_b = np.array(b, dtype=np.int32)
+        self.rule_c = np.array(c, dtype=np.int32)
+        self.start = ids.get('S')
+
+    def parse(self, words):
+        """Parses `words`
+
+        :param words([string]): list of words representing the string to parse
+        :return: ArrayChart
+        """
+        x = len(words)
+        cells = np.zeros((x, x, len(self.grammar.symbols)), dtype=bool)
+        backpointers = {}
+
+        for j in xrange(x):
+            A = self.grammar.left_for_right([words[j]])
+            if A:
+                cells[j, j, [self.grammar.symbol_id[a] for a in A]] = True
+            for i in reversed(xrange(j)):
+                # row k holds B over words i..i+k and C over words i+k+1..j
+                B = cells[i, i:j][:, self.rule_b]
+                C = cells[i+1:j+1, j][:, self.rule_c]
+                splits, rules = np.nonzero(B & C)
+                if len(rules):
+                    cells[i, j, self.rule_lhs[rules]] = True
+                    backpointers[i, j] = ((splits + i).astype(np.int32), rules.astype(np.int32))
+
+        return ArrayChart(words, cells, backpointers)
+
+    def all(self, chart):
+        '''Returns a list of parses'''
+        x = len(chart.words)
+        if not x or self.start is None or not chart.cells[0, x-1, self.start]:
+            return []
+
+        return self.retrieve_ids(chart, 0, x-1, self.start, {})
+
+    def retrieve_ids(self, chart, i, j, symbol, memo):
+        '''Returns every parse of nonterminal id `symbol` spanning words i..j'''
+        if (i, j, symbol) in memo:
+            return memo[i, j, symbol]
+
+        tag = self.grammar.symbols[symbol]
+        if i == j:
+            parses = ['({0})'.format(tag)]
+        else:
+            parses = []
+            for k, r, _ in self.derivations(chart, i, j, symbol):
+                for left in self.retrieve_ids(chart, i, k, self.rule_b[r], memo):
+                    for right in self.retrieve_ids(chart, k+1, j, self.rule_c[r], memo):
+                        parses.append('({0} {1} {2})'.format(tag, left, right))
+
+        memo[i, j, symbol] = parses
+        return parses
+
+    def derivations(self, chart, i, j, symbol):
+        '''Returns the derivations of nonterminal id `symbol` spanning words i..j
+
+        :return: [(k, rule, score)] where k is the split point and score the log-probability of the rule,
+            or [(None, None, score)] for a word
+        '''
+        if i == j:
+            return [(None, None, 0.0)]
+
+        splits, rules = chart.backpointers[i, j]
+        mask = self.rule_lhs[rules] == symbol
+        return [(int(k), int(r), 0.0) for k, r in zip(splits[mask], rules[mask])]
+
+    def forest(self, chart):
+        '''Returns the shared packed parse forest (utilities.forest.Forest) of `chart`'''
+        forest = Forest()
+        x = len(chart.words)
+        if not x or self.start is None or not np.isfinite(self.score(chart, 0, x-1, self.start)):
+            return forest
+
+        def build(i, j, symbol):
+            key = (self.grammar.symbols[symbol], i, j+1)
+            if key not in forest.nodes:
+                node = forest.node(*key)
+                for k, r, score in self.derivations(chart, i, j, symbol):
+                    if k is None:
+                        node.add((chart.words[i],), score)
+                    else:
+                        node.add((build(i, k, self.rule_b[r]), build(k+1, j, self.rule_c[r])), score)
+            return forest.nodes[key]
+
+        forest.root = build(0, x-1, self.start)
+        return forest
+
+    def score(self, chart, i, j, symbol):
+        '''Returns 0.0 if nonterminal id `symbol` spans words i..j in `chart`, -inf otherwise'''
+        return 0.0 if chart.cells[i, j, symbol] else -np.inf
+
+
+class ArrayChart:
+    '''Chart filled by ArrayCKY
+
+    Attributes:
+        words ([string]): parsed words
+        cells (np.array<bool>): cells[i, j, A] is True iff nonterminal A spans words i..j
+        backpointers (dict<(int, int), (np.array<int>, np.array<int>)>): for cell (i, j), the split points k
+            and the binary rule ids of all its derivations, as two parallel arrays
+    '''
+
+    def __init__(self, words, cells, backpointers):
+        self.words = words
+        self.cells = cells
+        self.backpointers = backpointers
+
+
+class ProbabilisticCKY(ArrayCKY):
+    """Viterbi CKY Parser for a PCFG
+
+    Keeps only the best log-probability of every nonterminal in a cell, so parsing is polynomial
+    whatever the ambiguity of the grammar. Cells can optionally be pruned to a beam.
+
+    Attributes:
+        rule_logprob (np.array<float>): log-probability of every binary rule A -> B C
+        beam (int): maximum number of nonterminals kept per cell or None
+        threshold (float): nonterminals whose log-probability is more than `threshold` below the best
+            of their cell are pruned, or None
+    """
+
+    def __init__(self, grammar, beam=None, threshold=None):
+        '''Initializes a probabilistic CKY Parser
+        :param grammar: utilities.grammar.Grammar object with rule probabilities - must be in CNF
+        :param beam: maximum number of nonterminals kept per cell
+        :param threshold: maximum difference of log-probability with the best nonterminal of a cell
+        '''
+        ArrayCKY.__init__(self, grammar)
+
+        symbols = grammar.symbols
+        probabilities = [grammar.probability(symbols[a], [symbols[b], symbols[c]])
+                         for a, b, c in zip(self.rule_lhs, self.rule_b, self.rule_c)]
+        with np.errstate(divide='ignore'):
+            self.rule_logprob = np.log(np.array(probabilities, dtype=np.float64))
+
+        self.beam = beam
+        self.threshold = threshold
+
+    def parse(self, words):
+        """Parses `words`
+
+        :param words([string]): list of words representing the string to parse
+        :return: ViterbiChart
+        """
+        x = len(words)
+        n = len(self.grammar.symbols)
+        scores = np.full((x, x, n), -np.inf)
+        splits = np.full((x, x, n), -1, dtype=np.int32)
+        rules = np.full((x, x, n), -1, dtype=np.int32)
+
+        for j in xrange(x):
+            with np.errstate(divide='ignore'):
+                for a in self.grammar.left_for_right([words[j]]) or []:
+                    scores[j, j, self.grammar.symbol_id[a]] = np.log(self.grammar.probability(a, [words[j]]))
+            self.prune(scores[j, j])
+
+            for i in reversed(xrange(j)):
+                # row k scores every rule with B over words i..i+k and C over words i+k+1..j
+                candidates = scores[i, i:j][:, self.rule_b] + scores[i+1:j+1, j][:, self.rule_c] + self.rule_logprob
+                best_split = candidates.argmax(axis=0)
+                best = candidates[best_split, np.arange(len(best_split))]
+
+                live = np.nonzero(np.isfinite(best))[0]
+                if not len(live):
+                    continue
+
+                cell = scores[i, j]
+                np.maximum.at(cell, self.rule_lhs[live], best[live])
+
+                # backpointer to the first rule reaching the best score of each nonterminal
+                winners = live[best[live] == cell[self.rule_lhs[live]]]
+                _, first = np.unique(self.rule_lhs[winners], return_index=True)
+                winners = winners[first]
+                splits[i, j, self.rule_lhs[winners]] = best_split[winners] + i
+                rules[i, j, self.rule_lhs[winners]] = winners
+
+                self.prune(cell)
+
+        return ViterbiChart(words, scores, splits, rules)
+
+    def prune(self, cell):
+        '''Prunes the log-probabilities of `cell` in place according to `beam` and `threshold`'''
+        if self.threshold is not None:
+            cell[cell < cell.max() - self.threshold] = -np.inf
+
+        if self.beam is not None and np.count_nonzero(np.isfinite(cell)) > self.beam:
+            cell[cell < np.partition(cell, -self.beam)[-self.beam]] = -np.inf
+
+    def all(self, chart):
+        '''Returns a list containing the most probable parse'''
+        best = self.best(chart)
+        return [best[1]] if best else []
+
+    def best(self, chart):
+        '''Returns the tuple (log-probability, parse) of the most probable parse or None'''
+        x = len(chart.words)
+        if not x or self.start is None or not np.isfinite(chart.scores[0, x-1, self.start]):
+            return None
+
+        return chart.scores[0, x-1, self.start], self.retrieve_best(chart, 0, x-1, self.start)
+
+    def retrieve_best(self, chart, i, j, symbol):
+        '''Returns the most probable parse of nonterminal id `symbol` spanning words i..j'''
+        tag = self.grammar.symbols[symbol]
+        if i == j:
+            return '({0})'.format(tag)
+
+        k, r = chart.splits[i, j, symbol], chart.rules[i, j, symbol]
+        return '({0} {1} {2})'.format(tag, self.retrieve_best(chart, i, k, self.rule_b[r]),
+                                      self.retrieve_best(chart, k+1, j, self.rule_c[r]))
+
+    def derivations(self, chart, i, j, symbol):
+        '''Returns the derivations of nonterminal id `symbol` spanning words i..j by rules of non-zero probability
+        whose children survived pruning
+
+        :return: [(k, rule, score)] where k is the split point and score the log-probability of the rule,
+            or [(None, None, score)] for a word
+        '''
+        if i == j:
+            return [(None, None, chart.scores[i, i, symbol])]
+
+        rules = np.nonzero((self.rule_lhs == symbol) & np.isfinite(self.rule_logprob))[0]
+        live = np.isfinite(chart.scores[i, i:j][:, self.rule_b[rules]] + chart.scores[i+1:j+1, j][:, self.rule_c[rules]])
+        return [(int(k) + i, int(rules[r]), self.rule_logprob[rules[r]]) for k, r in zip(*np.nonzero(live))]
+
+    def score(self, chart, i, j, symbol):
+        '''Returns the best log-probability of nonterminal id `symbol` spanning words i..j in `chart`'''
+        return chart.scores[i, j, symbol]
+
+    def k_best(self, chart, k):
+        '''Returns the list of tuples (log-probability, parse) of the `k` most probable parses
+
+        Parses are enumerated lazily from the forest of `chart`, see utilities.forest.Forest.k_best.
+        '''
+        return [(score, self.bracket(tree)) for score, tree in self.forest(chart).k_best(k)]
+
+    def bracket(self, tree):
+        '''Returns the parse string of the nltk.Tree `tree`, without its words'''
+        if all(isinstance(child, basestring) for child in tree):
+            return '({0})'.format(tree.label())
+        return '({0} {1})'.format(tree.label(), ' '.join(self.bracket(child) for child in tree))
+
+
+class ViterbiChart:
+    '''Chart filled by ProbabilisticCKY
+
+    Attributes:
+        words ([string]): parsed words
+        scores (np.array<float>): scores[i, j, A] is the best log-probability of nonterminal A spanning words i..j
+        splits (np.array<int>): split point k of the best derivation of each (i, j, A)
+        rules (np.array<int>): binary rule id of the best derivation of each (i, j, A)
+    '''
+
+    def __init__(self, words, scores, splits, rules):
+        self.words = words
+        self.scores = scores
+        self.splits = splits
+        self.rules = rules
+
+
 import unittest
 
 class CKYTest(unittest.TestCase):
+    rules = [
+        'S -> NP VP',
+        'S -> X1 VP',
+        'X1 -> Aux NP',
+        'S -> book | include | prefer',
+        'S -> Verb NP',
+        'S -> X2 PP',
+        'S -> Verb PP',
+        'S -> VP PP',
+        'NP -> I | she | me',
+        'NP -> TWA | Houston',
+        'NP -> Det Nominal',
+        'Nominal -> book | flight | meal | money',
+        'Nominal -> Nominal Noun',
+        'Nominal -> Nominal PP',
+        'VP -> book | include | prefer',
+        'VP -> Verb NP',
+        'VP -> X2 PP',
+        'X2 -> Verb NP',
+        'VP -> Verb PP',
+        'VP -> VP PP',
+        'PP -> Preposition NP',
+        'Preposition -> from | through',
+        'Det -> a | the',
+        'Verb -> book',
+        'Noun -> book'
+    ]
+
     def setUp(self):
-        rules = [
-            'S -> NP VP',
-            'S -> X1 VP',
-            'X1 -> Aux NP',
-            'S -> book | include | prefer',
-            'S -> Verb NP',
-            'S -> X2 PP',
-            'S -> Verb PP',
-            'S -> VP PP',
-            'NP -> I | she | me',
-            'NP -> TWA | Houston',
-            'NP -> Det Nominal',
-            'Nominal -> book | flight | meal | money',
-            'Nominal -> Nominal Noun',
-            'Nominal -> Nominal PP',
-            'VP -> book | include | prefer',
-            'VP -> Verb NP',
-            'VP -> X2 PP',
-            'X2 -> Verb NP',
-            'VP -> Verb PP',
-            'VP -> VP PP',
-            'PP -> Preposition NP',
-            'Preposition -> from | through',
-            'Det -> a | the',
-            'Verb -> book',
-            'Noun -> book'
-        ]
-
-        grammar = Grammar(rules)
+        grammar = Grammar(self.rules)
         self.cky = CKY(grammar)
 
     def test_parse(self):
@@ -128,3 +460,158 @@ class CKYTest(unittest.TestCase):
 
 
 
+
+class ArrayCKYTest(CKYTest):
+    def setUp(self):
+        CKYTest.setUp(self)
+        self.array_cky = ArrayCKY(self.cky.grammar)
+
+    def test_parse(self):
+        words = 'book the flight through Houston'.split(' ')
+        expected = self.cky.all(self.cky.parse(words))
+
+        actual = self.array_cky.all(self.array_cky.parse(words))
+        self.assertEqual(len(expected), len(actual))
+        self.assertItemsEqual(expected, actual)
+
+    def test_parse_single_word(self):
+        self.assertEqual(['(S)'], self.array_cky.all(self.array_cky.parse(['book'])))
+
+    def test_no_parse(self):
+        self.assertEqual([], self.array_cky.all(self.array_cky.parse('the flight'.split(' '))))
+        self.assertEqual([], self.array_cky.all(self.array_cky.parse('not there'.split(' '))))
+        self.assertEqual([], self.array_cky.all(self.array_cky.parse([])))
+
+
+class ProbabilisticCKYTest(unittest.TestCase):
+    rules = [
+        'S -> NP VP [0.8] | VP PP [0.1] | Verb NP [0.1]',
+        'NP -> Det Nominal [0.6] | Houston [0.4]',
+        'Nominal -> flight [0.5] | Nominal PP [0.5]',
+        'VP -> Verb NP [0.7] | VP PP [0.3]',
+        'PP -> Preposition NP',
+        'Preposition -> through',
+        'Det -> the',
+        'Verb -> book',
+    ]
+
+    def setUp(self):
+        self.grammar = Grammar(self.rules)
+        self.words = 'book the flight through Houston'.split(' ')
+
+    def test_best(self):
+        pcky = ProbabilisticCKY(self.grammar)
+        score, parse = pcky.best(pcky.parse(self.words))
+
+        # attaching the PP to the verb phrase (0.0084) wins over attaching it to the flight (0.006)
+        self.assertEqual('(S (VP (Verb) (NP (Det) (Nominal))) (PP (Preposition) (NP)))', parse)
+        self.assertAlmostEqual(np.log(0.1 * 0.7 * 0.6 * 0.5 * 0.4), score)
+        self.assertEqual([parse], pcky.all(pcky.parse(self.words)))
+
+    def test_k_best(self):
+        pcky = ProbabilisticCKY(self.grammar)
+        chart = pcky.parse(self.words)
+
+        parses = pcky.k_best(chart, 10)
+        self.assertEqual(2, len(parses))
+        self.assertEqual(pcky.best(chart), parses[0])
+        self.assertEqual('(S (Verb) (NP (Det) (Nominal (Nominal) (PP (Preposition) (NP)))))', parses[1][1])
+        self.assertAlmostEqual(np.log(0.1 * 0.6 * 0.5 * 0.5 * 0.4), parses[1][0])
+
+        self.assertItemsEqual(ArrayCKY(self.grammar).all(ArrayCKY(self.grammar).parse(self.words)), [p for _, p in parses])
+        self.assertEqual(parses[:1], pcky.k_best(chart, 1))
+
+    def test_k_best_ambiguous(self):
+        grammar = Grammar(CKYTest.rules)
+        pcky, array_cky = ProbabilisticCKY(grammar), ArrayCKY(grammar)
+        words = 'book the flight through Houston'.split(' ')
+
+        parses = pcky.k_best(pcky.parse(words), 100)
+        expected = array_cky.all(array_cky.parse(words))
+        self.assertItemsEqual(expected, [p for _, p in parses])
+        self.assertEqual(sorted([s for s, _ in parses], reverse=True), [s for s, _ in parses])
+
+    def test_zero_probability(self):
+        # S -> A C and A -> b have probability 0, so they never appear in a parse
+        pcky = ProbabilisticCKY(Grammar(['S -> A B [1.0] | A C', 'A -> a [1.0] | b', 'B -> b', 'C -> b']))
+        chart = pcky.parse(['a', 'b'])
+        self.assertEqual([(0.0, '(S (A) (B))')], pcky.k_best(chart, 5))
+        self.assertEqual(1, pcky.forest(chart).count())
+        self.assertEqual([], pcky.k_best(pcky.parse(['b', 'b']), 5))
+
+    def test_pruning(self):
+        pcky = ProbabilisticCKY(self.grammar, beam=1)
+        chart = pcky.parse(self.words)
+        self.assertTrue((np.isfinite(chart.scores).sum(axis=2) <= 1).all())
+
+        pcky = ProbabilisticCKY(self.grammar, beam=2)
+        self.assertEqual(ProbabilisticCKY(self.grammar).k_best(pcky.parse(self.words), 10),
+                         pcky.k_best(pcky.parse(self.words), 10))
+
+        # only VP survives over the whole sentence
+        pcky = ProbabilisticCKY(self.grammar, threshold=0.0)
+        self.assertIsNone(pcky.best(pcky.parse(self.words)))
+
+    def test_no_parse(self):
+        pcky = ProbabilisticCKY(self.grammar)
+        self.assertIsNone(pcky.best(pcky.parse('the flight'.split(' '))))
+        self.assertEqual([], pcky.k_best(pcky.parse('the flight'.split(' ')), 5))
+        self.assertEqual([], pcky.all(pcky.parse([])))
+
+
+class ForestTest(unittest.TestCase):
+    def setUp(self):
+        self.grammar = Grammar(CKYTest.rules)
+        self.words = 'book the flight through Houston'.split(' ')
+
+    def test_forest(self):
+        cky, array_cky = CKY(self.grammar), ArrayCKY(self.grammar)
+        expected = array_cky.all(array_cky.parse(self.words))
+
+        for forest in [cky.forest(cky.parse(self.words), self.words), array_cky.forest(array_cky.parse(self.words))]:
+            self.assertEqual(len(expected), forest.count())
+            self.assertTrue(forest.is_ambiguous())
+            self.assertEqual(('S', 0, 5), (forest.root.label, forest.root.i, forest.root.j))
+            self.assertEqual(1, len(forest.nodes['Det', 1, 2].packed))
+
+            trees = list(forest.trees())
+            self.assertEqual(len(expected), len(set(str(t) for t in trees)))
+            self.assertItemsEqual(self.words, trees[0].leaves())
+
+    def test_forest_k_best(self):
+        pcky = ProbabilisticCKY(Grammar(ProbabilisticCKYTest.rules))
+        chart = pcky.parse(self.words)
+
+        k_best = pcky.forest(chart).k_best(10)
+        self.assertEqual([s for s, _ in pcky.k_best(chart, 10)], [s for s, _ in k_best])
+
+    def test_no_parse(self):
+        array_cky = ArrayCKY(self.grammar)
+        self.assertIsNone(array_cky.forest(array_cky.parse('the flight'.split(' '))).root)
+        self.assertEqual(0, array_cky.forest(array_cky.parse([])).count())
+
+
+class ParseManyTest(unittest.TestCase):
+    def test_parse_many(self):
+        sentences = [s.split(' ') for s in ['book the flight through Houston', 'book the flight', 'the flight']] * 5
+
+        for parser in [ArrayCKY(Grammar(CKYTest.rules)), ProbabilisticCKY(Grammar(ProbabilisticCKYTest.rules))]:
+            expected = [parser.parse_sentence(words) for words in sentences]
+            self.assertEqual(expected, list(parser.parse_many(sentences)))
+            self.assertEqual(expected, list(parser.parse_many(sentences, workers=2, chunksize=2)))
+            self.assertEqual(expected, list(parser.parse_many(iter(sentences), workers=2, chunksize=2, max_in_flight=1)))
+
+    def test_max_in_flight(self):
+        parser = ArrayCKY(Grammar(CKYTest.rules))
+        sentences = [s.split(' ') for s in ['book the flight through Houston', 'book the flight', 'the flight']] * 5
+        consumed = []
+
+        def generate():
+            for words in sentences:
+                consumed.append(words)
+                yield words
+
+        # 2 chunks of 2 sentences in flight besides the one being yielded
+        for k, trees in enumerate(parser.parse_many(generate(), workers=2, chunksize=2, max_in_flight=2)):
+            self.assertLessEqual(len(consumed), k + 2 * 2)
+        self.assertEqual(len(sentences), len(consumed))
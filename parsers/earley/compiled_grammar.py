@@ -0,0 +1,76 @@
+#!/usr/bin/python
+
+from collections import defaultdict
+
+
+class CompiledGrammar:
+    """A grammar precompiled for the Earley parser
+
+    Compiling once lets every parse predict a category and its whole left-corner closure in one step.
+    A compiled grammar holds no parse state and can be shared by any number of parsers.
+
+    Attributes:
+        grammar (Grammar): compiled grammar
+        productions (dict<string, [tuple]>): right-hand sides of each nonterminal as tuples
+        nullable (set<string>): nonterminals deriving the empty string
+        closure (dict<string, [(string, tuple)]>): rules (lhs, rhs) to predict along with each nonterminal, i.e.
+            the rules of every nonterminal in its left-corner closure that is not a POS
+        closure_symbols (dict<string, set<string>>): nonterminals predicted along with each nonterminal
+    """
+
+    def __init__(self, grammar):
+        """
+        Compiles `grammar`
+
+        :param grammar: utilities.grammar.Grammar object
+        """
+        self.grammar = grammar
+        self.productions = dict((l, [tuple(r) for r in right]) for l, right in grammar.grammar.iteritems())
+
+        # nullable: a rule whose right-hand side is empty or only made of nullable symbols
+        self.nullable = set()
+        changed = True
+        while changed:
+            changed = False
+            for l, right in self.productions.iteritems():
+                if l not in self.nullable and any(all(s in self.nullable for s in r) for r in right):
+                    self.nullable.add(l)
+                    changed = True
+
+        # direct left corners, skipping over nullable symbols
+        corners = defaultdict(list)
+        for l, right in self.productions.iteritems():
+            for r in right:
+                for s in r:
+                    if s in self.productions and not grammar.is_pos(s) and s not in corners[l]:
+                        corners[l].append(s)
+                    if s not in self.nullable:
+                        break
+
+        self.closure = {}
+        self.closure_symbols = {}
+        for l in self.productions:
+            if grammar.is_pos(l):
+                continue
+
+            symbols, seen = [l], set([l])
+            for s in symbols:   # breadth-first, `symbols` grows while iterating
+                for c in corners[s]:
+                    if c not in seen:
+                        symbols.append(c)
+                        seen.add(c)
+
+            self.closure[l] = [(s, r) for s in symbols for r in self.productions[s]]
+            self.closure_symbols[l] = seen
+
+    def get(self, lhs):
+        """Returns the right-hand sides (tuples) of the rules of `lhs` or []"""
+        return self.productions.get(lhs, [])
+
+    def is_pos(self, term):
+        """Returns True if `term` is a POS of the grammar"""
+        return self.grammar.is_pos(term)
+
+    def pos_for(self, word):
+        """Returns the POS of `word` or []"""
+        return self.grammar.pos_for(word)
@@ -17,6 +17,7 @@ Example
     ]
 
     # Initialize Earley parser
+    # (a CompiledGrammar(Grammar(rules)) can be given instead and shared by several parsers)
     earley = EarleyParser(Grammar(rules))
 
     # Get nltk.tree's for the sentence
@@ -27,23 +28,42 @@ Example
         tree.draw()
         # tree.print
 
+    # Parse a corpus over 4 processes
+    for trees in earley.parse_many(sentences, workers=4):
+        ...
+
 """
 
 import sys
+from collections import defaultdict
 
 from nltk.tree import Tree
 
+from compiled_grammar import CompiledGrammar
 from state import State
+from utilities import batch
+from utilities.forest import Forest
 
 
 class EarleyParser:
-    DUMMY_CHAR = '$'
+    """Earley Parser
 
-    chart = []
-    grammar = {}
+    Attributes:
+        chart ([Column]): chart of the last parsed sentence
+        backpointers (dict<State, [(State, State)]>): for every advanced state, the pairs (state before advancing
+            its dot, completed state it was advanced over or None if it skipped over a nullable category)
+    """
+
+    DUMMY_CHAR = '$'
 
     def __init__(self, grammar):
-        self.grammar = grammar
+        """
+        :param grammar: utilities.grammar.Grammar or CompiledGrammar object
+        """
+        self.grammar = grammar if isinstance(grammar, CompiledGrammar) else CompiledGrammar(grammar)
+        self.chart = []
+        self.words = []
+        self.backpointers = defaultdict(list)
 
     def parse(self, sentence):
         """
@@ -54,7 +74,8 @@ class EarleyParser:
         """
 
         self.words = sentence.split(' ')
-        self.chart = [[] for _ in range(len(self.words) + 1)]
+        self.chart = [Column() for _ in range(len(self.words) + 1)]
+        self.backpointers = defaultdict(list)
 
         self.enqueue(State(self.DUMMY_CHAR, ["S"], 0, 0, 0), 0)
 
@@ -74,16 +95,45 @@ class EarleyParser:
 
         return self.chart
 
+    def parse_sentence(self, sentence):
+        """
+        Parses `sentence` without changing the state of this parser
+
+        :param sentence: Sentence to parse
+        :return: Parse trees for `sentence` or the sentence verbatim, see tree()
+        """
+        parser = EarleyParser(self.grammar)
+        parser.parse(sentence)
+        return parser.tree()
+
+    def parse_many(self, sentences, workers=None, chunksize=64, max_in_flight=None):
+        """
+        Parses every sentence of `sentences`, optionally over a pool of `workers` processes
+
+        :return: generator of the results of parse_sentence() in input order, see batch.parse_many
+        """
+        return batch.parse_many(self, sentences, workers, chunksize, max_in_flight)
+
     def predictor(self, state):
         """
         Creates new states representing top-down expaectations generated during the parsing process
+
+        B and every category of its left-corner closure are predicted at once, the first time B is predicted in a column.
         :param state: A -> C @ B D [i,j]
         """
         B = state.after_dot()
         j = state.j
 
-        for y in self.grammar.get(B):
-            self.enqueue(State(B, y, 0, j, j), j)
+        if B in self.grammar.nullable:  # Aycock & Horspool: skip over B since it may derive nothing
+            self.enqueue(State(state.l, state.r, state.dot + 1, state.i, j), j, (state, None))
+
+        column = self.chart[j]
+        if B in column.predicted:
+            return
+        column.predicted |= self.grammar.closure_symbols.get(B, set())
+
+        for l, r in self.grammar.closure.get(B, []):
+            self.enqueue(State(l, r, 0, j, j), j)
 
     def scanner(self, state):
         """
@@ -106,20 +156,22 @@ class EarleyParser:
         B = state.l
         j, k = state.i, state.j
 
-        for old in self.chart[j]:
-            if old.after_dot() == B and not old.is_complete():
-                i = old.i
-                origin = old.origin[:]
-                origin.append(state)
-                self.enqueue(State(old.l, old.r, old.dot + 1, i, k, origin), k)
+        if j == k and B in self.grammar.nullable:  # already skipped over by the predictor
+            return
+
+        for old in self.chart[j].waiting.get(B, []):
+            self.enqueue(State(old.l, old.r, old.dot + 1, old.i, k), k, (old, state))
+
+    def enqueue(self, state, i, backpointer=None):
+        """ Enqueues State `state` at `i`-th level of self.chart
 
-    def enqueue(self, state, i):
-        """ Enqueues State `state` at `i`-th level of self.chart """
-        if not state in self.chart[i]:
+        :param backpointer: (State, State) the state `state` was advanced from and the completed state it was advanced over,
+            None if it skipped over a nullable category
+        """
+        if self.chart[i].get(state) is None:
             self.chart[i].append(state)
-        else: # state already in chart, append origin so we can trace back multiple parses
-            old = self.chart[i][self.chart[i].index(state)]
-            old.origin += state.origin
+        if backpointer is not None:  # keep every backpointer so we can trace back multiple parses
+            self.backpointers[state].append(backpointer)
 
     def tree(self):
         """
@@ -133,31 +185,121 @@ class EarleyParser:
         fin = State(self.DUMMY_CHAR, ["S"], 1, 0, len(self.words))
         last_chart = self.chart[len(self.chart) - 1]
 
-        if fin in last_chart:
-            index = last_chart.index(fin)
-            root = last_chart[index]
+        root = last_chart.get(fin)
+        if root is not None:
             self.treelist = []
-
-            for i in range(len(root.origin)):
-                self.treelist.append([])
-
-                tmp = []
-                for node in root.origin[i].origin:
-                    tmp.append(self.treeRecursive(node))
-
-                self.treelist[i] = Tree('S', tmp)
+            for _, s in self.backpointers[root]:
+                self.treelist += self.treeRecursive(s)
 
             return self.treelist
         else:
             return ' '.join(self.words)
 
+    def forest(self):
+        """
+        Constructs the shared packed parse forest of the sentence parsed by self.parse()
+
+        Every completed state of the chart is a constituent; its derivations are the ways of splitting
+        its right-hand side over completed constituents of the chart.
+
+        :return: utilities.forest.Forest - without root if parsing was unsuccessful
+        """
+        forest = Forest()
+        n = len(self.words)
+
+        completed = defaultdict(list)   # (lhs, i, j) -> completed states
+        ends = defaultdict(set)         # (lhs, i) -> j for every completed state
+        for column in self.chart:
+            for state in column:
+                if state.is_complete():
+                    completed[state.l, state.i, state.j].append(state)
+                    ends[state.l, state.i].add(state.j)
+
+        def splits(r, dot, i, j):
+            """Generates the lists of (symbol, i, j) spanning i..j for the symbols r[dot:]"""
+            if dot == len(r):
+                if i == j:
+                    yield []
+                return
+
+            if self.grammar.get(r[dot]):
+                candidates = ends[r[dot], i]
+            else:   # scanned word
+                candidates = [i + 1] if i < n and self.words[i] == r[dot] else []
+
+            for k in candidates:
+                if k <= j:
+                    for rest in splits(r, dot + 1, k, j):
+                        yield [(r[dot], i, k)] + rest
+
+        def build(label, i, j):
+            if (label, i, j) not in forest.nodes:
+                node = forest.node(label, i, j)
+                for state in completed[label, i, j]:
+                    for split in splits(state.r, 0, i, j):
+                        node.add(tuple(build(*s) if self.grammar.get(s[0]) else s[0] for s in split))
+            return forest.nodes[label, i, j]
+
+        if completed[self.DUMMY_CHAR, 0, n]:
+            forest.root = build("S", 0, n)
+
+        return forest
+
     def treeRecursive(self, node):
-        # base case - node of the form Det->That, []
-        if node.origin == []:
-            return Tree(node.l, node.r)
+        """Returns the parse trees of the completed state `node`"""
+        return [Tree(node.l, children) for children in self.children(node)]
+
+    def children(self, state):
+        """Generates the lists of subtrees of the constituents before the dot of `state`"""
+        if state.dot == 0:
+            yield []
+        elif state not in self.backpointers:
+            # base case - scanned state of the form Det->That
+            yield list(state.r)
+        else:
+            for previous, completed in self.backpointers[state]:
+                if completed is None:
+                    # skipped over a nullable category: its derivations are the completed states spanning nothing
+                    completed = self.chart[previous.j].completed.get((previous.after_dot(), previous.j), [])
+                else:
+                    completed = [completed]
+
+                for left in self.children(previous):
+                    for tree in [t for c in completed for t in self.treeRecursive(c)]:
+                        yield left + [tree]
+
+
+class Column(list):
+    """A column of the chart: the list of states ending at a position of the input
+
+    States are indexed by `State.key()` for constant-time duplicate detection and, if incomplete,
+    by the category after their dot for the completer.
+
+    Attributes:
+        states (dict<tuple, State>): states of the column by key
+        waiting (dict<string, [State]>): incomplete states of the column by category after the dot
+        completed (dict<(string, int), [State]>): completed states of the column by left-hand side and start
+        predicted (set<string>): categories already predicted in the column
+    """
+
+    def __init__(self):
+        list.__init__(self)
+        self.states = {}
+        self.waiting = defaultdict(list)
+        self.completed = defaultdict(list)
+        self.predicted = set()
+
+    def append(self, state):
+        list.append(self, state)
+        self.states[state.key()] = state
+        if not state.is_complete():
+            self.waiting[state.after_dot()].append(state)
+        else:
+            self.completed[state.l, state.i].append(state)
 
-        ret = []
-        for n in node.origin:
-            ret.append(self.treeRecursive(n))
+    def get(self, state):
+        """Returns the state of the column equal to `state` or None"""
+        return self.states.get(state.key())
 
-        return Tree(node.l, ret)
+    def __contains__(self, state):
+        return isinstance(state, State) and state.key() in self.states
@@ -1,29 +1,30 @@
 #!/usr/bin/python
 
-from copy import deepcopy
 
-
-class State:
+class State(object):
     """A state as defined in Earley's algorithm
 
+    States are slotted and hashable; the completed states that generated them are kept by the parser
+    in a side table (see EarleyParser.backpointers).
+
     Attributes:
         l (string): left-hand side of the production
-        r (string): right-hand side of the production
+        r (tuple<string>): right-hand side of the production
         dot (int): current position in the production
         i (int): position i in the input at which the matching of this production began
         j (int): position j in the input at which the matching of this production ended
-        origin ([State]): list of completed states that generated the constituents of the states
     """
 
+    __slots__ = ('l', 'r', 'dot', 'i', 'j')
+
     DOT = '@'
 
-    def __init__(self, l, r, dot, i, j, origin=[]):
+    def __init__(self, l, r, dot, i, j):
         self.l = l
-        self.r = r
+        self.r = tuple(r)
         self.dot = dot
         self.i = i
         self.j = j
-        self.origin = origin
 
     def is_complete(self):
         """Returns True if the state is completed (dot is at the end). """
@@ -40,18 +41,22 @@ class State:
         """ Returns the constituent after the dot or None. """
         return self.r[self.dot] if self.dot < len(self.r) else None
 
-    def __repr__(self):
-        r = deepcopy(self.r)
-
-        try:
-            r.insert(self.dot, self.DOT)
-        except Exception:
-            print 'The right-side should be an array'
+    def key(self):
+        """ Returns the tuple (l, r, dot, i) identifying the state within a column of the chart. """
+        return self.l, self.r, self.dot, self.i
 
-        return "({0} -> {1}, ({2},{3}) {4})".format(self.l, ' '.join(r), self.i, self.j, [o.l for o in self.origin])
+    def __repr__(self):
+        r = self.r[:self.dot] + (self.DOT,) + self.r[self.dot:]
+        return "({0} -> {1}, ({2},{3}))".format(self.l, ' '.join(r), self.i, self.j)
 
     def __eq__(self, other):
-        """ Two states are equal if their all their attributes but origin are the same. """
+        """ Two states are equal if their all their attributes are the same. """
         if isinstance(other, State):
             return self.l == other.l and self.r == other.r and self.i == other.i and self.j == other.j and self.dot == other.dot
-        return False
\ No newline at end of file
+        return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.l, self.r, self.dot, self.i, self.j))
\ No newline at end of file
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+import unittest
+
+from compiled_grammar import CompiledGrammar
+from utilities.grammar import Grammar
+
+
+class CompiledGrammarTest(unittest.TestCase):
+    def setUp(self):
+        rules = [
+            'S -> NP VP | VP',
+            'NP -> Det N | NP PP',
+            'VP -> VT NP | VI PP',
+            'PP -> P NP',
+            'Det -> a',
+            'N -> circle | square',
+            'VT -> touches',
+            'VI -> is',
+            'P -> above'
+        ]
+        self.grammar = CompiledGrammar(Grammar(rules))
+
+    def test_get(self):
+        self.assertItemsEqual([('Det', 'N'), ('NP', 'PP')], self.grammar.get('NP'))
+        self.assertEqual([], self.grammar.get('NotThere'))
+
+    def test_closure(self):
+        self.assertEqual(set(['S', 'NP', 'VP']), self.grammar.closure_symbols['S'])
+        self.assertItemsEqual([('S', ('NP', 'VP')), ('S', ('VP',)), ('NP', ('Det', 'N')), ('NP', ('NP', 'PP')),
+                               ('VP', ('VT', 'NP')), ('VP', ('VI', 'PP'))], self.grammar.closure['S'])
+        self.assertEqual(set(['PP']), self.grammar.closure_symbols['PP'])
+        self.assertNotIn('Det', self.grammar.closure)  # POS are scanned, not predicted
+
+    def test_nullable(self):
+        self.assertEqual(set(), self.grammar.nullable)
+
+        compiled = CompiledGrammar(Grammar(['S -> Mod NP', 'Mod -> Adj |', 'NP -> N', 'Adj -> big', 'N -> circle']))
+
+        self.assertEqual(set(['Mod']), compiled.nullable)
+        self.assertFalse(compiled.is_pos('Mod'))
+        self.assertEqual(set(['S', 'Mod', 'NP']), compiled.closure_symbols['S'])  # NP is a left corner after Mod
+
+        compiled = CompiledGrammar(Grammar(['S -> A B', 'A -> E E', 'B -> b | E', 'E ->']))
+        self.assertEqual(set(['S', 'A', 'B', 'E']), compiled.nullable)
@@ -9,7 +9,8 @@ Test grammar and string taken from
 from unittest import TestCase
 from nltk import Tree
 
-from earley_parser import EarleyParser
+from compiled_grammar import CompiledGrammar
+from earley_parser import EarleyParser, Column
 from utilities.grammar import Grammar
 from state import State
 
@@ -32,7 +33,7 @@ class TestEarleyParser(TestCase):
 
         self.earley = EarleyParser(grammar)
         self.earley.words = 'a circle touches a triangle'.split(' ')
-        self.earley.chart = [[] for _ in range(5)]
+        self.earley.chart = [Column() for _ in range(5)]
 
     def test_parse(self):
         """A complete parse"""
@@ -60,6 +61,66 @@ class TestEarleyParser(TestCase):
         self.assertIn(State('VP', ['VT', 'NP'], 0, 0, 0), self.earley.chart[0])
         self.assertIn(State('VP', ['VI', 'PP'], 0, 0, 0), self.earley.chart[0])
 
+    def test_predictor_once_per_category(self):
+        self.earley.predictor(State('S', ['VP'], 0, 0, 0))
+        self.earley.predictor(State('X', ['VP'], 0, 0, 0))
+
+        self.assertEqual(2, len(self.earley.chart[0]))
+        self.assertIn('VP', self.earley.chart[0].predicted)
+
+    def test_predictor_closure(self):
+        self.earley.predictor(State(self.earley.DUMMY_CHAR, ['S'], 0, 0, 0))
+
+        self.assertItemsEqual([State('S', ['NP', 'VP'], 0, 0, 0), State('NP', ['Det', 'N'], 0, 0, 0)], self.earley.chart[0])
+
+    def test_shared_compiled_grammar(self):
+        compiled = self.earley.grammar
+        self.assertIsInstance(compiled, CompiledGrammar)
+
+        earley = EarleyParser(compiled)
+        self.assertIs(compiled, earley.grammar)
+        earley.parse('a circle touches a triangle')
+        self.earley.parse('a circle touches a triangle')
+        self.assertEqual(self.earley.tree(), earley.tree())
+
+    def test_parse_nullable(self):
+        earley = EarleyParser(Grammar(['S -> NP', 'NP -> Det Mod N', 'Mod -> Adj |', 'Det -> a', 'Adj -> big', 'N -> circle']))
+
+        earley.parse('a circle')
+        self.assertEqual([Tree('S', [Tree('NP', [Tree('Det', ['a']), Tree('Mod', []), Tree('N', ['circle'])])])], earley.tree())
+
+        earley.parse('a big circle')
+        self.assertEqual([Tree('S', [Tree('NP', [Tree('Det', ['a']), Tree('Mod', [Tree('Adj', ['big'])]), Tree('N', ['circle'])])])], earley.tree())
+
+    def test_parse_nullable_derivation(self):
+        # the trees keep the derivation of the empty string, as the forest does
+        earley = EarleyParser(Grammar(['S -> NP', 'NP -> Det Mod N', 'Mod -> Adj | E', 'E -> ', 'Det -> a', 'Adj -> big', 'N -> circle']))
+
+        earley.parse('a circle')
+        expected = [Tree('S', [Tree('NP', [Tree('Det', ['a']), Tree('Mod', [Tree('E', [])]), Tree('N', ['circle'])])])]
+        self.assertEqual(expected, earley.tree())
+        self.assertEqual(expected, list(earley.forest().trees()))
+
+        # two ways of deriving nothing
+        earley = EarleyParser(Grammar(['S -> Det Mod N', 'Mod -> E | F', 'E -> ', 'F -> ', 'Det -> a', 'N -> circle']))
+        earley.parse('a circle')
+        self.assertEqual(2, len(earley.tree()))
+        self.assertItemsEqual(earley.tree(), list(earley.forest().trees()))
+
+    def test_parse_sentence(self):
+        trees = self.earley.parse_sentence('a circle touches a triangle')
+
+        self.assertEqual(1, len(trees))
+        self.assertEqual(5, len(self.earley.chart), "Doesn't change the state of the parser")
+        self.assertEqual('Not valid', self.earley.parse_sentence('Not valid'))
+
+    def test_parse_many(self):
+        sentences = ['a circle touches a triangle', 'Not valid', 'a square is above a circle', 'a triangle touches a circle'] * 5
+        expected = [self.earley.parse_sentence(s) for s in sentences]
+
+        self.assertEqual(expected, list(self.earley.parse_many(sentences)))
+        self.assertEqual(expected, list(self.earley.parse_many(iter(sentences), workers=2, chunksize=3)))
+
     def test_scanner(self):
         state1 = State('NP', ['Det', 'N'], 1, 0, 1)
         state2 = State('VP', ['VT', 'NP'], 1, 0, 1)
@@ -81,6 +142,14 @@ class TestEarleyParser(TestCase):
 
         self.assertIn(State('NP', ['Det', 'N'], 1, 0, 1), self.earley.chart[1])
 
+    def test_backpointers(self):
+        self.earley.parse('a circle touches a triangle')
+
+        completed = State('N', ['circle'], 1, 1, 2)
+        self.assertEqual([(State('NP', ['Det', 'N'], 1, 0, 1), completed)],
+                         self.earley.backpointers[State('NP', ['Det', 'N'], 2, 0, 2)])
+        self.assertNotIn(completed, self.earley.backpointers)  # scanned
+
     def test_enqueue(self):
         state = State('S', ['VP'], 0, 0, 0)
         self.earley.enqueue(state, 0)
@@ -118,3 +187,59 @@ class TestEarleyParser(TestCase):
 
         print earley.tree()
 
+    def test_forest(self):
+        # No parse for sentence
+        self.earley.parse('Not valid')
+        self.assertIsNone(self.earley.forest().root)
+        self.assertEqual(0, self.earley.forest().count())
+
+        self.earley.parse('a circle touches a triangle')
+        forest = self.earley.forest()
+        self.assertEqual(1, forest.count())
+        self.assertFalse(forest.is_ambiguous())
+        self.assertEqual(self.earley.tree(), list(forest.trees()))
+
+    def test_forest_with_ambiguity(self):
+        rules = ['S->NP | VP', 'NP->book', 'VP->book']
+        earley = EarleyParser(Grammar(rules))
+        earley.parse('book')
+
+        forest = earley.forest()
+        self.assertEqual(2, forest.count())
+        self.assertTrue(forest.root.is_ambiguous())
+        self.assertItemsEqual(earley.tree(), list(forest.trees()))
+        self.assertEqual(2, len(forest.k_best(5)))
+
+    def test_forest_shares_constituents(self):
+        # PP attachment: the subject has two parses sharing their constituents
+        rules = [
+            'S -> NP VP',
+            'NP -> Det N | NP PP',
+            'VP -> VI PP',
+            'PP -> P NP',
+            'Det -> a',
+            'N -> circle | square | triangle',
+            'VI -> is',
+            'P -> above | below'
+        ]
+        earley = EarleyParser(Grammar(rules))
+        earley.parse('a circle above a square below a triangle is below a circle')
+
+        forest = earley.forest()
+        self.assertEqual(2, forest.count())
+        self.assertEqual(2, len(set(str(t) for t in forest.trees())))
+        self.assertItemsEqual(earley.tree(), list(forest.trees()))
+        self.assertEqual(1, len(forest.nodes['Det', 3, 4].packed))
+        self.assertTrue(forest.nodes['NP', 0, 8].is_ambiguous())
+
+    def test_column(self):
+        column = Column()
+        column.append(State('NP', ['Det', 'N'], 1, 0, 1))
+        column.append(State('Det', ['a'], 1, 0, 1))
+
+        self.assertIn(State('NP', ['Det', 'N'], 1, 0, 1), column)
+        self.assertNotIn(State('NP', ['Det', 'N'], 0, 0, 1), column)
+        self.assertIs(column[0], column.get(State('NP', ['Det', 'N'], 1, 0, 1)))
+        self.assertIsNone(column.get(State('NP', ['Det', 'N'], 2, 0, 1)))
+        self.assertEqual([column[0]], column.waiting['N'])
+        self.assertNotIn('a', column.waiting)
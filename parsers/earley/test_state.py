@@ -37,3 +37,16 @@ class StateTests(unittest.TestCase):
 
         self.state.dot = 2
         self.assertEqual(self.state.after_dot(), None)
+
+    def test_hash(self):
+        self.assertEqual(State('S', ['VP', 'NP'], 0, 0, 0), self.state)
+        self.assertEqual(hash(State('S', ['VP', 'NP'], 0, 0, 0)), hash(self.state))
+        self.assertNotEqual(State('S', ['VP', 'NP'], 1, 0, 0), self.state)
+        self.assertEqual(1, len(set([self.state, State('S', ('VP', 'NP'), 0, 0, 0)])))
+
+    def test_slots(self):
+        self.assertFalse(hasattr(self.state, '__dict__'))
+
+    def test_repr(self):
+        self.state.dot = 1
+        self.assertEqual('(S -> VP @ NP, (0,0))', repr(self.state))
@@ -0,0 +1,68 @@
+#!/usr/bin/python
+
+"""Batch
+
+Parses a corpus of sentences, optionally spread over a pool of processes.
+
+Example
+
+    parser = EarleyParser(CompiledGrammar(Grammar(rules)))
+
+    # results come back in input order, as soon as they are ready
+    for trees in parser.parse_many(sentences, workers=4):
+        ...
+"""
+
+import itertools
+from collections import deque
+from multiprocessing import Pool
+
+_parser = None  # parser of a worker process
+
+
+def parse_many(parser, sentences, workers=None, chunksize=64, max_in_flight=None):
+    """
+    Generates `parser.parse_sentence(sentence)` for every sentence of `sentences`, in input order
+
+    The parser (and its compiled grammar) is handed once to every worker when the pool starts;
+    `parse_sentence` must not keep any per-parse state on the parser. At most `max_in_flight` chunks are
+    sent to the pool ahead of the one being yielded, so memory stays bounded however long `sentences` is.
+
+    :param parser: parser with a `parse_sentence` method
+    :param sentences: iterable of sentences
+    :param workers: number of processes, or None to parse in the calling process
+    :param chunksize: number of sentences sent to a worker at a time
+    :param max_in_flight: 4 chunks per process by default
+    """
+    if not workers:
+        for sentence in sentences:
+            yield parser.parse_sentence(sentence)
+        return
+
+    sentences = iter(sentences)
+    chunks = iter(lambda: list(itertools.islice(sentences, chunksize)), [])
+
+    pool = Pool(workers, _initialize, (parser,))
+    try:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_parse_chunk, (chunk,)))
+            if len(pending) >= (max_in_flight or 4 * workers):
+                for result in pending.popleft().get():
+                    yield result
+        while pending:
+            for result in pending.popleft().get():
+                yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _initialize(parser):
+    global _parser
+    _parser = parser
+
+
+def _parse_chunk(sentences):
+    return [_parser.parse_sentence(sentence) for sentence in sentences]
@@ -0,0 +1,239 @@
+#!/usr/bin/python
+
+"""Forest
+
+Shared packed parse forest (SPPF): every constituent (label, i, j) of a sentence is stored once as a
+SymbolNode and each of its alternative derivations is a PackedNode, so an exponential number of parse
+trees is represented in polynomial space.
+
+Example
+
+    forest = parser.forest()
+
+    forest.count()          # number of trees, computed without enumerating them
+    forest.is_ambiguous()
+
+    # first 10 trees, built lazily
+    for tree in itertools.islice(forest.trees(), 10):
+        tree.draw()
+"""
+
+import heapq
+
+from nltk.tree import Tree
+
+
+class SymbolNode:
+    """A constituent of the forest
+
+    Attributes:
+        label (string): label of the constituent
+        i (int): position in the input at which the constituent begins
+        j (int): position in the input at which the constituent ends (exclusive)
+        packed ([PackedNode]): alternative derivations of the constituent
+    """
+
+    def __init__(self, label, i, j):
+        self.label = label
+        self.i = i
+        self.j = j
+        self.packed = []
+        self._keys = set()
+
+    def add(self, children, score=0.0):
+        """
+        Adds the derivation `children` to the node unless it is already there
+
+        :param children: tuple of SymbolNode or words
+        :param score: log-probability of the rule used by the derivation
+        """
+        key = tuple(id(c) if isinstance(c, SymbolNode) else c for c in children)
+        if key not in self._keys:
+            self._keys.add(key)
+            self.packed.append(PackedNode(tuple(children), score))
+
+    def is_ambiguous(self):
+        """Returns True if the node has more than one derivation"""
+        return len(self.packed) > 1
+
+    def __repr__(self):
+        return "({0}, ({1},{2}) {3})".format(self.label, self.i, self.j, len(self.packed))
+
+
+class PackedNode:
+    """A derivation of a SymbolNode
+
+    Attributes:
+        children (tuple): SymbolNode or words (string) derived by the rule
+        score (float): log-probability of the rule, 0.0 if the grammar is not probabilistic
+    """
+
+    def __init__(self, children, score=0.0):
+        self.children = children
+        self.score = score
+
+    def __repr__(self):
+        return "({0})".format(' '.join(c.label if isinstance(c, SymbolNode) else c for c in self.children))
+
+
+class Forest:
+    """A shared packed parse forest
+
+    Attributes:
+        root (SymbolNode): root of the forest or None if the sentence has no parse
+        nodes (dict<(string, int, int), SymbolNode>): every node of the forest by (label, i, j)
+    """
+
+    def __init__(self):
+        self.root = None
+        self.nodes = {}
+
+    def node(self, label, i, j):
+        """Returns the node (label, i, j), creating it if needed"""
+        key = (label, i, j)
+        if key not in self.nodes:
+            self.nodes[key] = SymbolNode(label, i, j)
+        return self.nodes[key]
+
+    def count(self):
+        """Returns the number of parse trees in the forest without enumerating them"""
+        if self.root is None:
+            return 0
+
+        counts = {}
+
+        def count(node):
+            if node not in counts:
+                total = 0
+                for packed in node.packed:
+                    product = 1
+                    for child in packed.children:
+                        if isinstance(child, SymbolNode):
+                            product *= count(child)
+                    total += product
+                counts[node] = total
+            return counts[node]
+
+        return count(self.root)
+
+    def is_ambiguous(self):
+        """Returns True if the forest contains more than one parse tree"""
+        return self.count() > 1
+
+    def trees(self):
+        """Lazily generates every parse tree (nltk.Tree) of the forest"""
+        if self.root is None:
+            return iter([])
+        return self._trees(self.root)
+
+    def k_best(self, k):
+        """
+        Returns the `k` best parse trees of the forest by decreasing score
+
+        The score of a tree is the sum of the scores of its derivations. Derivations are enumerated lazily
+        (Huang & Chiang, 2005. Better k-best parsing), so only what the `k` best trees need is built.
+
+        :return: [(float, nltk.Tree)]
+        """
+        if self.root is None:
+            return []
+
+        derivations = _KBestDerivations()
+        trees = []
+        for n in xrange(k):
+            derivation = derivations.get(self.root, n)
+            if derivation is None:
+                break
+            trees.append((derivation[0], derivations.tree(self.root, n)))
+
+        return trees
+
+    def _trees(self, node):
+        for packed in node.packed:
+            for children in self._product(packed.children):
+                yield Tree(node.label, list(children))
+
+    def _product(self, children):
+        if not children:
+            yield ()
+            return
+
+        first = children[0]
+        for tree in self._trees(first) if isinstance(first, SymbolNode) else [first]:
+            for rest in self._product(children[1:]):
+                yield (tree,) + rest
+
+
+class _KBestDerivations:
+    '''Lazily enumerates the derivations of SymbolNodes by decreasing score
+
+    A derivation is a tuple (score, index of the PackedNode, ranks of the derivations of its children).
+    '''
+
+    def __init__(self):
+        self.derivations = {}    # node -> derivations found so far, best first
+        self.candidates = {}     # node -> heap of (-score, index, ranks)
+        self.seen = {}           # node -> set of (index, ranks) pushed on its heap
+
+    def get(self, node, n):
+        '''Returns the `n`-th best derivation of `node` or None'''
+        if node not in self.derivations:
+            self._initialize(node)
+
+        derivations = self.derivations[node]
+        candidates = self.candidates[node]
+        while len(derivations) <= n:
+            if derivations:
+                self._push_successors(node, derivations[-1])
+            if not candidates:
+                return None
+            score, index, ranks = heapq.heappop(candidates)
+            derivations.append((-score, index, ranks))
+
+        return derivations[n]
+
+    def tree(self, node, n):
+        '''Returns the nltk.Tree of the `n`-th best derivation of `node`'''
+        _, index, ranks = self.get(node, n)
+        children = [self.tree(c, r) if isinstance(c, SymbolNode) else c
+                    for c, r in zip(node.packed[index].children, ranks)]
+        return Tree(node.label, children)
+
+    def _initialize(self, node):
+        self.derivations[node] = []
+        self.candidates[node] = []
+        self.seen[node] = set()
+
+        for index, packed in enumerate(node.packed):
+            ranks = (0,) * len(packed.children)
+            score = self._score(packed, ranks)
+            if score is not None:
+                self.candidates[node].append((-score, index, ranks))
+                self.seen[node].add((index, ranks))
+        heapq.heapify(self.candidates[node])
+
+    def _push_successors(self, node, derivation):
+        _, index, ranks = derivation
+        packed = node.packed[index]
+
+        for p, child in enumerate(packed.children):
+            if not isinstance(child, SymbolNode):
+                continue
+            successor = ranks[:p] + (ranks[p] + 1,) + ranks[p+1:]
+            if (index, successor) in self.seen[node]:
+                continue
+            score = self._score(packed, successor)
+            if score is not None:
+                self.seen[node].add((index, successor))
+                heapq.heappush(self.candidates[node], (-score, index, successor))
+
+    def _score(self, packed, ranks):
+        '''Returns the score of `packed` using the derivations `ranks` of its children or None'''
+        score = packed.score
+        for child, rank in zip(packed.children, ranks):
+            if isinstance(child, SymbolNode):
+                derivation = self.get(child, rank)
+                if derivation is None:
+                    return None
+                score += derivation[0]
+        return score
@@ -7,31 +7,57 @@ from collections import defaultdict
 class Grammar:
     """A grammar containing rules of the form "A -> B | C D"
 
+    Rules can carry a probability to form a PCFG, e.g. "A -> B [0.3] | C D [0.7]".
+
     Attributes:
         grammar (dict<string, [string]>): Dictionary of rules of the form "A": ["B", "C D"] (A -> B | C D)
         word_pos (dict<string, [string]>): Dictionary of POS for a given word
         pos (set<string>): POS found in the grammar
+        rhs_index (dict<tuple, [string]>): Dictionary of left-hand sides for a right-hand side tuple (B, C) -> [A]
+        symbols ([string]): Nonterminals in order of first appearance; the position of a symbol is its id
+        symbol_id (dict<string, int>): Dictionary of the integer id of each nonterminal
+        probabilities (dict<(string, tuple), float>): Probability of each rule (A, (B, C)) -> p
     """
 
+    PROBABILITY = re.compile(r'\[\s*([\d.eE+-]+)\s*\]')
+
     def __init__(self, rules):
         """
         Initialize a grammar with a set of rules and extracts POS from the rules.
 
-        :param rules: array of strings of the form "A -> B | C".
+        :param rules: array of strings of the form "A -> B | C" or "A -> B [0.4] | C [0.6]".
+            An empty alternative, e.g. "A -> B |", is a rule deriving the empty string.
+            Rules without a probability share evenly the probability mass left by the other rules of their left-hand side.
         """
 
         self.grammar = defaultdict(list)
         self.word_pos = dict()
         self.pos = set()
+        self.rhs_index = dict()
+        self.symbols = []
+        self.symbol_id = dict()
+        self.probabilities = dict()
+
+        given = defaultdict(dict)  # left -> {right: probability} for rules with an explicit probability
 
         for rule in rules:
             rule = rule.rstrip()
             if len(rule) > 0:
                 rule = rule.split('->')  # split start/end
                 left = rule[0].strip()
-                right = [(re.sub(r'[^a-zA-Z\d\s-]', '', r)).strip().split(' ') for r in rule[1].split('|')]
+                right = []
+                for r in rule[1].split('|'):
+                    probability = self.PROBABILITY.search(r)
+                    r = (re.sub(r'[^a-zA-Z\d\s-]', '', self.PROBABILITY.sub('', r))).split()
+                    if probability:
+                        given[left][tuple(r)] = float(probability.group(1))
+                    right.append(r)
                 self.grammar[left] += right
 
+                if left not in self.symbol_id:
+                    self.symbol_id[left] = len(self.symbols)
+                    self.symbols.append(left)
+
         # extract POS tags
         # pos iff on lhs of rhs without lhs
         # det -> that
@@ -42,6 +68,24 @@ class Grammar:
                     if not self.grammar.has_key(r2):
                         self.pos.add(left)
 
+        # index rules by right-hand side and words by POS so lookups don't scan the grammar
+        for left, right in self.grammar.iteritems():
+            for r in right:
+                lefts = self.rhs_index.setdefault(tuple(r), [])
+                if left not in lefts:
+                    lefts.append(left)
+
+                for w in r:
+                    if not w in self.grammar:
+                        self.word_pos.setdefault(w.lower(), []).append(left)
+
+        # rule probabilities
+        for left, right in self.grammar.iteritems():
+            rest = set(tuple(r) for r in right) - set(given[left])
+            share = max(0.0, 1.0 - sum(given[left].itervalues())) / len(rest) if rest else 0.0
+            for r in right:
+                self.probabilities[left, tuple(r)] = given[left].get(tuple(r), share)
+
     def get(self, lhs):
         """
         Returns the right-hand side of rules associated with `lhs`
@@ -49,7 +93,17 @@ class Grammar:
         :param lhs: string
         :return: Array of strings if `lhs` was in the rules, empty array otherwise.
         """
-        return self.grammar.get(lhs) if self.grammar.has_key(lhs) else []
+        return self.grammar.get(lhs, [])
+
+    def probability(self, lhs, right):
+        """
+        Returns the probability of rule `lhs` -> `right` or 0.0 if it is not in the grammar
+
+        :param lhs: string
+        :param right: [string]
+        :return: float
+        """
+        return self.probabilities.get((lhs, tuple(right)), 0.0)
 
     def is_pos(self, term):
         """
@@ -66,26 +120,15 @@ class Grammar:
         :param word: string
         :return:  [string] or []
         """
-        if not self.word_pos:
-            for l in self.grammar.keys():
-                r = self.grammar[l]
-                for rr in r:
-                    for w in rr:
-                        if not w in self.grammar:
-                            if not w in self.word_pos:
-                                self.word_pos[w.lower()] = []
-                            self.word_pos[w.lower()].append(l)
-        return self.word_pos[word.lower()] if self.word_pos.has_key(word.lower()) else []
+        return self.word_pos.get(word.lower(), [])
 
     def left_for_right(self, right):
-        """Returns a set of left constituents spanning `right`"""
+        """Returns a set of left constituents spanning `right` or None
 
-        constituents = []
-        for l, r in self.grammar.iteritems():
-            if right in r:
-                constituents.append(l)
-
-        return constituents if len(constituents)>0 else None
+        :param right: [string] right-hand side of a rule, e.g. ['Det', 'N']
+        :return: [string] or None
+        """
+        return self.rhs_index.get(tuple(right))
 
     @property
     def terminals(self):
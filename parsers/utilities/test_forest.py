@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+import unittest
+from itertools import islice
+
+from nltk import Tree
+
+from forest import Forest
+
+
+class ForestTest(unittest.TestCase):
+    def setUp(self):
+        # 'a b c' with X -> A B | A C, C -> B' and both a three-way and a two-way ambiguity under S
+        self.forest = Forest()
+        s = self.forest.root = self.forest.node('S', 0, 2)
+        x = self.forest.node('X', 0, 2)
+        a = self.forest.node('A', 0, 1)
+        b = self.forest.node('B', 1, 2)
+
+        a.add(('a',), -1.0)
+        b.add(('b',), -1.0)
+        b.add(('c',), -2.0)
+        x.add((a, b), -0.5)
+        s.add((x,), 0.0)
+        s.add((a, b), -1.0)
+
+    def test_node(self):
+        self.assertIs(self.forest.root, self.forest.node('S', 0, 2))
+        self.assertEqual(4, len(self.forest.nodes))
+
+    def test_add(self):
+        a = self.forest.node('A', 0, 1)
+        a.add(('a',), -1.0)
+        self.assertEqual(1, len(a.packed), "Doesn't add duplicates")
+        self.assertFalse(a.is_ambiguous())
+        self.assertTrue(self.forest.root.is_ambiguous())
+
+    def test_count(self):
+        self.assertEqual(4, self.forest.count())
+        self.assertTrue(self.forest.is_ambiguous())
+        self.assertEqual(0, Forest().count())
+        self.assertFalse(Forest().is_ambiguous())
+
+    def test_trees(self):
+        expected = [
+            Tree('S', [Tree('X', [Tree('A', ['a']), Tree('B', ['b'])])]),
+            Tree('S', [Tree('X', [Tree('A', ['a']), Tree('B', ['c'])])]),
+            Tree('S', [Tree('A', ['a']), Tree('B', ['b'])]),
+            Tree('S', [Tree('A', ['a']), Tree('B', ['c'])]),
+        ]
+        self.assertEqual(expected, list(self.forest.trees()))
+        self.assertEqual(expected[:2], list(islice(self.forest.trees(), 2)))
+        self.assertEqual([], list(Forest().trees()))
+
+    def test_k_best(self):
+        k_best = self.forest.k_best(10)
+        self.assertEqual([-2.5, -3.0, -3.5, -4.0], [score for score, _ in k_best])
+        self.assertEqual(Tree('S', [Tree('X', [Tree('A', ['a']), Tree('B', ['b'])])]), k_best[0][1])
+        self.assertItemsEqual(list(self.forest.trees()), [tree for _, tree in k_best])
+        self.assertEqual(k_best[:2], self.forest.k_best(2))
+        self.assertEqual([], Forest().k_best(2))
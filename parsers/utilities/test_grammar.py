@@ -45,3 +45,36 @@ class GrammarTest(unittest.TestCase):
         self.assertItemsEqual(set(['N', 'V']), self.grammar.left_for_right(['book']))
         self.assertItemsEqual(set(['V']), self.grammar.left_for_right(['walk']))
         self.assertItemsEqual(set(['NP']), self.grammar.left_for_right(['Det', 'N']))
+
+    def test_left_for_right_missing(self):
+        self.assertIsNone(self.grammar.left_for_right(['NotThere']))
+        self.assertIsNone(self.grammar.left_for_right(['N', 'Det']))
+
+    def test_symbols(self):
+        self.assertEqual(['S', 'VP', 'NP', 'V', 'N', 'Det'], self.grammar.symbols)
+        for i, symbol in enumerate(self.grammar.symbols):
+            self.assertEqual(i, self.grammar.symbol_id[symbol])
+
+    def test_probability(self):
+        grammar = Grammar([
+            'NP -> Det Nominal [0.6] | Nominal [0.4]',
+            'Det -> the [0.8]',
+            'Det -> a',
+            'Nominal -> flight | meal'
+        ])
+        self.assertItemsEqual([['Det', 'Nominal'], ['Nominal']], grammar.get('NP'))
+        self.assertAlmostEqual(0.6, grammar.probability('NP', ['Det', 'Nominal']))
+        self.assertAlmostEqual(0.4, grammar.probability('NP', ['Nominal']))
+        self.assertAlmostEqual(0.8, grammar.probability('Det', ['the']))
+        self.assertAlmostEqual(0.2, grammar.probability('Det', ['a']))      # mass left by the other rules
+        self.assertAlmostEqual(0.5, grammar.probability('Nominal', ['meal']))   # uniform without probabilities
+        self.assertEqual(0.0, grammar.probability('NP', ['NotThere']))
+        self.assertEqual(['Det'], grammar.pos_for('the'))
+
+    def test_empty_alternative(self):
+        grammar = Grammar(['S -> Det Mod N', 'Mod -> Adj |', 'E ->', 'Det -> a', 'Adj -> big', 'N -> circle'])
+        self.assertItemsEqual([['Adj'], []], grammar.get('Mod'))
+        self.assertEqual([[]], grammar.get('E'))
+        self.assertFalse(grammar.is_pos('Mod'))
+        self.assertFalse(grammar.is_pos('E'))
+        self.assertItemsEqual(['Mod', 'E'], grammar.left_for_right([]))
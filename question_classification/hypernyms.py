@@ -0,0 +1,128 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Hypernyms
+
+Table of the hypernym chains of the first sense of WordNet nouns, so the hypernym of a head word at any level
+is found without walking WordNet.
+
+Example
+
+    table = HypernymTable()
+    table.hypernym('dogs', 2)   # u'domestic_animal.n.01'
+
+    # every noun of WordNet at once, saved and memory-mapped
+    table.build().save('hypernyms')
+    Question.hypernyms = HypernymTable.load('hypernyms')
+"""
+
+import os
+
+import numpy as np
+from nltk.corpus import wordnet as wn
+
+
+class HypernymTable:
+    """Hypernym chains of the first sense of noun lemmas
+
+    The chain of a lemma is its first sense followed by the first hypernym of each sense of the chain.
+    Chains are stored as arrays: sorted lemmas, the offset of the chain of each lemma, and the synset ids of
+    the chains. Lemmas missing from the arrays are looked up on first use.
+
+    Attributes:
+        lemmas (np.array): sorted lemmas of the chains in the arrays
+        offsets (np.array): chain of lemmas[k] is chains[offsets[k]:offsets[k + 1]]
+        chains (np.array): synset ids of the chains
+        synsets (np.array): name of each synset id
+    """
+
+    def __init__(self):
+        self.lemmas = np.zeros(0, dtype='U1')
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.chains = np.zeros(0, dtype=np.int32)
+        self.synsets = np.zeros(0, dtype='U1')
+        self._chains = {}       # lemma -> chain of synset names, for lemmas missing from the arrays
+        self._hypernyms = {}    # (head, level) -> hypernym
+
+    def hypernym(self, head, level=1):
+        """
+        Returns the hypernym `level` levels above the first noun sense of `head`, or its most general
+        hypernym if there are less levels, or None if `head` is not a noun
+
+        :param head: word, not necessarily a lemma
+        :return: string synset name or None
+        """
+        key = (head, level)
+        if key not in self._hypernyms:
+            lemma = wn.morphy(head.lower(), 'n')
+            chain = self.chain(lemma) if lemma is not None else []
+            self._hypernyms[key] = chain[min(level, len(chain) - 1)] if chain else None
+        return self._hypernyms[key]
+
+    def chain(self, lemma):
+        """Returns the hypernym chain of the noun lemma `lemma` as a list of synset names"""
+        k = np.searchsorted(self.lemmas, lemma)
+        if k < len(self.lemmas) and self.lemmas[k] == lemma:
+            return self.synsets[self.chains[self.offsets[k]:self.offsets[k + 1]]].tolist()
+
+        if lemma not in self._chains:
+            self._chains[lemma] = self._walk(lemma)
+        return self._chains[lemma]
+
+    def build(self):
+        """Adds the chain of every noun lemma of WordNet
+
+        :return: self
+        """
+        for lemma in wn.all_lemma_names('n'):
+            self.chain(lemma)
+        return self._pack()
+
+    def save(self, path):
+        """Saves the table to the directory `path`, one .npy file per array"""
+        self._pack()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        for name in ('lemmas', 'offsets', 'chains', 'synsets'):
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+
+    @classmethod
+    def load(cls, path):
+        """Returns the table saved to the directory `path`, with its arrays memory-mapped"""
+        table = cls()
+        for name in ('lemmas', 'offsets', 'chains', 'synsets'):
+            setattr(table, name, np.load(os.path.join(path, name + '.npy'), mmap_mode='r'))
+        return table
+
+    def _walk(self, lemma):
+        """Returns the hypernym chain of `lemma` from WordNet"""
+        synsets = wn.synsets(lemma, 'n')
+        if not synsets:
+            return []
+
+        chain = [synsets[0]]
+        while chain[-1].hypernyms():
+            chain.append(chain[-1].hypernyms()[0])
+        return [s.name() for s in chain]
+
+    def _pack(self):
+        """Moves the chains looked up on first use into the arrays
+
+        :return: self
+        """
+        if not self._chains:
+            return self
+
+        chains = dict((lemma, self.chain(lemma)) for lemma in self.lemmas.tolist())
+        chains.update(self._chains)
+
+        lemmas = sorted(chains)
+        names = sorted(set(name for chain in chains.itervalues() for name in chain))
+        ids = dict((name, i) for i, name in enumerate(names))
+
+        self.lemmas = np.array(lemmas, dtype=np.unicode_) if lemmas else np.zeros(0, dtype='U1')
+        self.offsets = np.cumsum([0] + [len(chains[lemma]) for lemma in lemmas]).astype(np.int64)
+        self.chains = np.array([ids[name] for lemma in lemmas for name in chains[lemma]], dtype=np.int32)
+        self.synsets = np.array(names, dtype=np.unicode_) if names else np.zeros(0, dtype='U1')
+        self._chains = {}
+        return self
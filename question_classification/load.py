@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 
 import codecs
+import itertools
+from multiprocessing import Pool, cpu_count
 
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.linear_model import SGDClassifier, LogisticRegression, ElasticNet
@@ -16,22 +18,32 @@ from sklearn.preprocessing import Normalizer, StandardScaler
 from sklearn.pipeline import Pipeline, FeatureUnion
 
 import numpy as np
+from nltk.corpus import wordnet as wn
 
 from question import Question, Label
+from semantics.trees import TreeBank
+from store import FeatureStore
 
 
 class HeadWordExtractorPlus(BaseEstimator, TransformerMixin):
     """Extracts wh-word and head word (optionally, WordNet semantic features for head word) and prepares the data for DictVectorizer"""
-    def __init__(self, semantic_features=False, depth=1):
+    def __init__(self, semantic_features=False, depth=1, n_jobs=1):
         self.semantic_features = semantic_features
         self.depth = depth
+        self.n_jobs = n_jobs
+
+    @property
+    def uses_wordnet(self):
+        return self.semantic_features
 
     def fit(self, x, y=None):
         return self
 
     def transform(self, questions):
         print 'HeadWordExtractorPlus> transforming'
+        return parallel_transform(self, questions, self.n_jobs)
 
+    def _transform_serial(self, questions):
         lst = []
         for q in questions:
             dict = {'wh-word': q.type}
@@ -49,51 +61,145 @@ class HeadWordExtractorPlus(BaseEstimator, TransformerMixin):
 
 class WordShapeExtractor(BaseEstimator, TransformerMixin):
     """ Extracts the word shape for each question and represents the shapes as strings for language modelling """
+    def __init__(self, n_jobs=1):
+        self.n_jobs = n_jobs
+
+    uses_wordnet = False
+
     def fit(self, x, y=None):
         return self
 
     def transform(self, questions):
         print 'WordShapeExtractor> transforming'
+        return parallel_transform(self, questions, self.n_jobs)
+
+    def _transform_serial(self, questions):
         return [' '.join(q.word_shape) for q in questions]
 
 class TextExtractor(BaseEstimator, TransformerMixin):
     """ Extract text from each question to be used for language modelling """
 
-    def __init__(self, lower=False, lemmatize=False, punct=False, stops=False):
+    def __init__(self, lower=False, lemmatize=False, punct=False, stops=False, n_jobs=1):
         self.lower=lower
         self.lemmatize = lemmatize
         self.punct = punct
         self.stops = stops
+        self.n_jobs = n_jobs
+
+    @property
+    def uses_wordnet(self):
+        return self.lemmatize
 
     def fit(self, x, y=None):
         return self
 
     def transform(self, questions):
-        return [q.normalize(q.words, lower=self.lower, lemmatize=self.lemmatize, punct=self.punct, stops=self.stops) for q in questions]
+        return parallel_transform(self, questions, self.n_jobs)
+
+    def _transform_serial(self, questions):
+        return [q.normalized(lower=self.lower, lemmatize=self.lemmatize, punct=self.punct, stops=self.stops) for q in questions]
 
 
-def load_instances(f, head_present=False):
+def parallel_transform(transformer, questions, n_jobs=1, chunks_per_job=4):
+    '''
+    Transforms `questions` with `transformer._transform_serial` split in chunks over a pool of `n_jobs` processes
+
+    WordNet is loaded in this process before the pool starts if `transformer.uses_wordnet`, so the workers
+    inherit it rather than each reading it again.
+
+    :param n_jobs number of processes, all CPUs if -1. Transforms in this process if 1.
+    :return the concatenation of the transformed chunks, in the order of `questions`
+    '''
+    if not isinstance(n_jobs, (int, long)) or n_jobs == 0 or n_jobs < -1:
+        raise ValueError("n_jobs must be a positive number of processes or -1 for all CPUs, not {0!r}".format(n_jobs))
+
+    questions = list(questions)
+    if n_jobs == -1:
+        n_jobs = cpu_count()
+    if n_jobs == 1 or len(questions) < 2:
+        return transformer._transform_serial(questions)
+
+    if transformer.uses_wordnet:
+        _load_wordnet()
+
+    size = -(-len(questions) // (n_jobs * chunks_per_job))
+    chunks = [(transformer, questions[i:i + size]) for i in xrange(0, len(questions), size)]
+
+    pool = Pool(n_jobs)
+    try:
+        transformed = pool.map(_transform_chunk, chunks)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    return [x for chunk in transformed for x in chunk]
+
+_loaded = False     # whether WordNet was loaded in this process
+
+def _load_wordnet():
+    """Loads WordNet once in this process rather than on the first lookup of every worker"""
+    global _loaded
+    if not _loaded:
+        wn.morphy('questions', 'n')     # the first lookup reads the noun index
+        _loaded = True
+
+def _transform_chunk(args):
+    transformer, questions = args
+    return transformer._transform_serial(questions)
+
+
+def load_instances(f, head_present=False, cache_dir=None, trees_present=False, **features):
     '''
     Loads data set in file `f`. Returns a list of tuple (label, Question) where `head` is optional
 
     :param f file with data set to load
     :param head_present Will extract the head. Insert '+heads' in `f` before the extension.
+    :param trees_present Gives each question its parse tree, see load_trees. Heads are found from the trees
+        unless `head_present`.
+    :param cache_dir Directory of a FeatureStore the features of the questions are loaded from, or computed and saved to
+    :param features Features to store, see FeatureStore
 
     Note. The data set has one question per line with format "type text"
     Example. DESC:manner How did serfdom develop in and then leave Russia ?
 
     '''
+    if cache_dir is not None:
+        store = FeatureStore(cache_dir, **features)
+        source = heads_filename(f) if head_present else trees_filename(f) if trees_present else f
+        instances = store.load(source)
+        if instances is None:
+            instances = load_instances(f, head_present, trees_present=trees_present)
+            store.save(source, *instances)
+        return instances
+
     labels = []
     questions = []
 
-    if head_present:
-        name, extension = f.split('.')
-        f = "{0}+heads.{1}".format(name, extension)
+    print "Loading data set {1} ({0} head)".format('with' if head_present else 'without',
+                                                   heads_filename(f) if head_present else f)
+
+    for label, question in iter_instances(f, head_present, trees_present):
+        labels.append(label)
+        questions.append(question)
+
+    return labels, questions
 
-    print "Loading data set {1} ({0} head)".format('with' if head_present else 'without', f)
+
+def iter_instances(f, head_present=False, trees_present=False):
+    '''
+    Generates the tuples (Label, Question) of the data set in file `f`, reading it one line at a time
+
+    :param f file with data set to load
+    :param head_present Will extract the head, see load_instances
+    :param trees_present Gives each question its parse tree, see load_instances
+    '''
+    trees = iter(load_trees(f)) if trees_present else itertools.repeat(None)
+    if head_present:
+        f = heads_filename(f)
 
     with codecs.open(f, 'r', encoding='ascii') as file:
-        for line in file.readlines():
+        for line in file:
             split_point = line.find(' ')    # find first space
             label = line[0:split_point]
             text = line[split_point+1:].rstrip('\n')
@@ -104,17 +210,57 @@ def load_instances(f, head_present=False):
                 head = text[split_point+1:]     # head was extracted before, keep it
                 text = text[0:split_point]
 
-            labels.append(Label(label))
-            questions.append(Question(text, head, head_present=True))
+            # without a heads file, the head is found from the tree if there is one
+            tree = next(trees)
+            yield Label(label), Question(text, head, tree, head_present=head_present or tree is None)
 
-    return labels, questions
+
+def iter_batches(f, transformer=None, batch_size=1000, granularity='coarse', head_present=False, trees_present=False):
+    '''
+    Generates the data set in file `f` by batches of `batch_size` questions, e.g. for SGDClassifier.partial_fit
+
+    :param transformer fitted transformer (e.g. the features of a Pipeline) applied to each batch of questions
+    :param granularity granularity of the targets, 'coarse' or 'fine'
+    :return generator of tuples (features or questions, targets) of at most `batch_size` questions
+    '''
+    instances = iter_instances(f, head_present, trees_present)
+    while True:
+        batch = list(itertools.islice(instances, batch_size))
+        if not batch:
+            return
+
+        labels, questions = zip(*batch)
+        targets = [l.get(granularity) for l in labels]
+        yield (transformer.transform(questions) if transformer is not None else list(questions)), targets
+
+
+def heads_filename(filename):
+    '''Returns the name of the file with the heads of the data set in file `filename`'''
+    name, extension = filename.split('.')
+    return "{0}+heads.{1}".format(name, extension)
+
+
+def trees_filename(filename):
+    '''Returns the name of the file with the parse trees of the data set in file `filename`'''
+    name, extension = filename.split('.')
+    return "{0}+trees.{1}".format(name, extension)
+
+
+def load_trees(f):
+    '''
+    Loads the parse trees of the questions of the data set in file `f`, saved by extract_trees_persistent
+
+    The k-th tree is the tree of the k-th question, e.g. Question(text, tree=trees[k])
+    :return TreeBank
+    '''
+    with codecs.open(trees_filename(f), 'r', encoding='ascii') as file:
+        return TreeBank.read(file)
 
 
 def extract_heads_persistent(labels, questions, filename):
     data = zip([l.fine for l in labels], [q.text for q in questions], [q.head_word for q in questions])
 
-    name, extension = filename.split('.')
-    f = "{0}+heads.{1}".format(name, extension)
+    f = heads_filename(filename)
     with codecs.open(f, 'w', encoding='ascii') as file:
         for item in data:
             print>>file, "{0} {1} {2}".format(item[0], item[1], item[2])
@@ -123,8 +269,7 @@ def extract_trees_persistent(questions, filename):
     print 'Extracting trees from {0}'.format(filename)
     trees = [q.tree for q in questions]
 
-    name, extension = filename.split('.')
-    f = "{0}+trees.{1}".format(name, extension)
+    f = trees_filename(filename)
     with codecs.open(f, 'w') as file:
         for t in trees:
             print>>file, t
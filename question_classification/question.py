@@ -2,56 +2,117 @@
 # -*- coding: utf-8 -*-
 
 import re
+from collections import OrderedDict, namedtuple
 # from bllipparser import RerankingParser, Tree, tokenize
 # from bllipparser import Tree
-from nltk.corpus import stopwords, wordnet as wn
+from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 from nltk import word_tokenize
 from nltk.wsd import lesk
 from string import punctuation
 from semantics.head_finder import SemanticHeadFinder
+from semantics.trees import read_tree
+from hypernyms import HypernymTable
 
 wordnet_lemmatizer = WordNetLemmatizer()
 stop = stopwords.words('english')
 
+
+class Memo(object):
+    """Memo of the results of a function of one argument, which must never return None
+
+    The memo is emptied whenever it holds `maxsize` results, which keeps a hit to a single dict lookup.
+
+    Attributes:
+        function (callable): memoized function
+        maxsize (int): number of results kept at most
+        hits (int): calls answered from the memo
+        misses (int): calls to `function`
+    """
+
+    CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+    def __init__(self, function, maxsize=100000):
+        self.function = function
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+
+    def __call__(self, key):
+        value = self._results.get(key)
+        if value is None:
+            if len(self._results) >= self.maxsize:
+                self._results.clear()
+            value = self._results[key] = self.function(key)
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def cache_info(self):
+        """Returns the hits, misses, maximum and current size of the memo"""
+        return self.CacheInfo(self.hits, self.misses, self.maxsize, len(self._results))
+
+    def clear(self):
+        self._results.clear()
+        self.hits = self.misses = 0
+
+
+# tokens repeat a lot across questions, so they are lemmatized once, keyed by the token as it appears
+lemmatized = Memo(wordnet_lemmatizer.lemmatize)
+lower_lemmatized = Memo(lambda word: wordnet_lemmatizer.lemmatize(word.lower()))
+
 # print 'Loading BLLIP reranking parser...'
 # rrp = RerankingParser.fetch_and_load('WSJ+Gigaword-v2')
 
-class Question:
+class Question(object):
     """Question
 
-    Encapsulates a question
+    Encapsulates a question. Features are computed on first access and cached.
 
     Attributes:
         text (string): text of the question
         words ([sting]): individual words of the questions
+        normalized_text (string): lowercased and lemmatized words of the question, without punctuation
         type (string): wh_word of the question
 
     """
 
+    __slots__ = ('text', '_words', '_normalized', '_type', '_word_shape', '_head', '_head_word', '_head_present', '_tree',
+                 '_hypernyms')
+
     # Types of the different feature categories
     # Useful for binarizing the features
     types = ['what', "which", "when", "where", "who", "how", "why", "rest"]
     word_shapes = ['all_lower', 'all_upper', 'mixed', 'all_digit', 'other']
 
     # Regex patterns to help question head word identification
+    # set1 is in priority order: the first pattern matching a question gives its placeholder
     patterns = {
-        'set1': {
-            'DESC:def_1': '^what (is|are) (a |an |the )?([^\s]* ?){1,2} \?$',
-            'DESC:def_2': '^what (do|does) .* mean \?$',
-            'ENTY:substance': '^what (is|are) .* ((composed|made|made out) of) \?$',
-            'DESC:desc': '^what (does) .* (do) \?$',
-            'ENTY:term': '^what do you call',
-            'DESC:reason_1': '^what causes?',
-            'DESC:reason_2': '^what (is|are) .* (used for) \?$',
-            'ABBR:exp': '^what (do|does) .* (stand for) \?$'
-        },
+        'set1': OrderedDict([
+            ('ABBR:exp', '^what (do|does) .* (stand for) \?$'),
+            ('ENTY:substance', '^what (is|are) .* ((composed|made|made out) of) \?$'),
+            ('DESC:reason_2', '^what (is|are) .* (used for) \?$'),
+            ('DESC:desc', '^what (does) .* (do) \?$'),
+            ('DESC:def_2', '^what (do|does) .* mean \?$'),
+            ('ENTY:term', '^what do you call'),
+            ('DESC:reason_1', '^what causes?'),
+            ('DESC:def_1', '^what (is|are) (a |an |the )?([^\s]* ?){1,2} \?$'),
+        ]),
         'set2': {
             'HUM:desc': '^[w|W]ho (is|was) [A-Z]'
         }
     }
 
+    # set1 as one alternation whose named group `p<i>` matches for the i-th pattern, tried in order
+    set1 = re.compile('|'.join('(?P<p{0}>{1})'.format(i, p) for i, p in enumerate(patterns['set1'].values())),
+                      re.IGNORECASE)
+    set1_placeholders = dict(('p{0}'.format(i), k) for i, k in enumerate(patterns['set1']))
+    set2 = re.compile(patterns['set2']['HUM:desc'])
+
     head_finder = SemanticHeadFinder()
+    hypernyms = HypernymTable()     # shared by every question, can be replaced by one loaded with HypernymTable.load
 
     def __init__(self, question, head=None, tree=None, head_present=False):
         """
@@ -60,24 +121,77 @@ class Question:
         """
 
         self.text = question
-        self.words = word_tokenize(self.text)   # use NLTK's tokenizer because Bllip's raises an encoding error
-        self.normalized_text = self.normalize(self.words)
-
-        wh_word = self.words[0].lower()
-        self.type = wh_word if wh_word in Question.types[:-1] else Question.types[-1]
+        self._words = None
+        self._normalized = None     # (lower, lemmatize, punct, stops) -> normalized text, created on first use
+        self._type = None
+        self._word_shape = None
 
         self._head = head
+        self._head_word = None     # (head word,) once found, since the head word may be None
         self._head_present = head_present
         self._tree = tree
+        self._hypernyms = None      # level -> hypernym, only when loaded from a feature store
+
+    @classmethod
+    def from_cache(cls, text, words, normalized, word_shape, head_word, head, hypernyms):
+        """
+        Creates a Question whose features were computed before, see store.FeatureStore
+
+        :param normalized: dict<(lower, lemmatize, punct, stops), string> normalized texts
+        :param head_word: head word of the question, see head_word
+        :param head: head the hypernyms are found from
+        :param hypernyms: dict<int, string> hypernym of `head` for some levels
+        """
+        question = cls(text, head, head_present=True)
+        question._words = words
+        question._normalized = normalized
+        question._word_shape = word_shape
+        question._head_word = (head_word,)
+        question._hypernyms = hypernyms
+        return question
+
+    def __getstate__(self):
+        return dict((slot, getattr(self, slot)) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in state.iteritems():
+            setattr(self, slot, value)
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = word_tokenize(self.text)   # use NLTK's tokenizer because Bllip's raises an encoding error
+        return self._words
+
+    @property
+    def normalized_text(self):
+        return self.normalized()
+
+    @property
+    def type(self):
+        if self._type is None:
+            wh_word = self.words[0].lower()
+            self._type = wh_word if wh_word in Question.types[:-1] else Question.types[-1]
+        return self._type
+
+    def normalized(self, lower=True, lemmatize=True, punct=True, stops=False):
+        """Returns the words of the question normalized with normalize(), cached for each set of options"""
+        key = (lower, lemmatize, punct, stops)
+        if self._normalized is None:
+            self._normalized = {}
+        if key not in self._normalized:
+            self._normalized[key] = self.normalize(self.words, lower, lemmatize, punct, stops)
+        return self._normalized[key]
 
     def normalize(self, words, lower=True, lemmatize=True, punct=True, stops=False):
-        normalized = []
-        for word in words:
-            if lower:
-                word = word.lower()
-            if lemmatize:
-                word = wordnet_lemmatizer.lemmatize(word)
-            normalized.append(word)
+        if lower and lemmatize:
+            normalized = [lower_lemmatized(word) for word in words]
+        elif lemmatize:
+            normalized = [lemmatized(word) for word in words]
+        elif lower:
+            normalized = [word.lower() for word in words]
+        else:
+            normalized = list(words)
 
         if punct:
             normalized = [word for word in normalized if word not in punctuation]
@@ -107,22 +221,39 @@ class Question:
     @property
     def word_shape(self):
         """Returns the word shape for each word in the question"""
-        return [self.shape(word) for word in self.words[:-1]]
+        if self._word_shape is None:
+            self._word_shape = [self.shape(word) for word in self.words[:-1]]
+        return self._word_shape
 
     ### HEAD WORD
 
     @property
     def tree(self):
+        """Returns the parse tree of the question, read from its bracketed form if it is a string"""
         if self._tree is None:
-            self._tree = rrp.simple_parse(self.words)
-        return Tree(self._tree)
+            raise ValueError("No parse tree for question '{0}', load the data set with its trees, "
+                             "see load.load_instances".format(self.text))
+        if isinstance(self._tree, basestring):
+            self._tree = read_tree(self._tree)
+        return self._tree
 
     @property
     def head_word(self):
         """head_word Gets the head word of the question
         From Huang et al. 2008)
         """
+        if self._head_word is None:
+            self._head_word = (self._find_head_word(),)
+        return self._head_word[0]
 
+    @property
+    def head(self):
+        """Returns the head the hypernyms are found from, or None. Finds the head word first"""
+        if self._head_word is None:
+            self._head_word = (self._find_head_word(),)
+        return self._head
+
+    def _find_head_word(self):
         # Find the head word
 
         if self.type in ['when', 'where', 'why']:
@@ -132,11 +263,11 @@ class Question:
             return self.normalized_text.split(' ', 2)[1]    # return first word after type
 
         if self.type == 'what':
-            for placehold, pattern in Question.patterns['set1'].iteritems():
-                if re.match(pattern, self.text, re.IGNORECASE):
-                    return placehold
+            match = Question.set1.match(self.text)
+            if match:
+                return Question.set1_placeholders[match.lastgroup]
 
-        if self.type == 'who' and re.match(Question.patterns['set2']['HUM:desc'], self.text):
+        if self.type == 'who' and Question.set2.match(self.text):
             return 'HUM:desc'
 
         if not self._head_present:
@@ -149,26 +280,15 @@ class Question:
     def hypernym(self, level=1):
         '''Returns the hypernym of `self._head_word` or None'''
 
+        if self._hypernyms is not None and level in self._hypernyms:
+            return self._hypernyms[level]
+
         if self._head is None:
             return None
 
-        # 1. Get POS - actually we know it's a noun because that's what we've extracted
-        pos = 'n'
-
-        # 2. Which sense of the word is needed to be augmented
-        try:
-            sense = wn.synsets(self._head, pos)[0]  # get the best sense. Performance of ~55%, better than most Lesk algorithms
-
-            for _ in range(level):
-                hypernyms = sense.hypernyms()
-                if len(hypernyms)==0: break
-                sense = hypernyms[0]
-
-            return sense.name()
-        except IndexError:
-            return None
-        except AttributeError:
-            return None
+        # the first sense of the head as a noun - actually we know it's a noun because that's what we've extracted.
+        # Performance of ~55%, better than most Lesk algorithms
+        return Question.hypernyms.hypernym(self._head, level)
 
     ### OTHER
     def __repr__(self):
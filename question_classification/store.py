@@ -0,0 +1,145 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Feature store
+
+Caches the features of the questions of a data set on disk, so they are computed once rather than on every run.
+Each data set is stored in its own directory of .npy columns, named after a hash of the contents of the data set
+file, the features stored and the version of the format. Editing the file or changing the features thus never
+loads stale features.
+
+Example
+
+    store = FeatureStore('cache', depths=(1, 3))
+
+    instances = store.load('data/train_5500.label')
+    if instances is None:
+        instances = load_instances('data/train_5500.label')
+        store.save('data/train_5500.label', *instances)
+
+    # or simply
+    labels, questions = load_instances('data/train_5500.label', cache_dir='cache')
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from question import Question, Label
+
+
+class FeatureStore:
+    """Columnar on-disk cache of the features of questions
+
+    Attributes:
+        directory (string): directory holding one subdirectory per cached data set
+        depths ([int]): levels of the hypernyms stored
+        normalizations ([(bool, bool, bool, bool)]): options (lower, lemmatize, punct, stops) of the normalized texts stored
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory, depths=(1,), normalizations=((True, True, True, False),)):
+        self.directory = directory
+        self.depths = list(depths)
+        self.normalizations = [tuple(options) for options in normalizations]
+
+    def key(self, f):
+        """Returns the key of the data set file `f`: hash of its contents, the features stored and the version"""
+        digest = hashlib.sha1()
+        with open(f, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), ''):
+                digest.update(block)
+        digest.update(json.dumps({'depths': self.depths, 'normalizations': self.normalizations}, sort_keys=True))
+        digest.update(str(self.VERSION))
+        return digest.hexdigest()
+
+    def path(self, f):
+        """Returns the directory of the features of the data set file `f`"""
+        return os.path.join(self.directory, "{0}-{1}".format(os.path.basename(f), self.key(f)))
+
+    def load(self, f):
+        """
+        Loads the features of the data set file `f`
+
+        :return: ([Label], [Question]) or None if they are not in the store
+        """
+        path = self.path(f)
+        if not os.path.isdir(path):
+            return None
+
+        columns = dict((name[:-len('.npy')], np.load(os.path.join(path, name)))
+                       for name in os.listdir(path) if name.endswith('.npy'))
+
+        labels = [Label(label) for label in columns['labels'].tolist()]
+        words = _unflatten(columns['tokens'].tolist(), columns['token_offsets'])
+        shapes = _unflatten([Question.word_shapes[c] for c in columns['shapes'].tolist()], columns['shape_offsets'])
+        normalized = [columns['normalized_{0}'.format(i)].tolist() for i in xrange(len(self.normalizations))]
+        head_words = _nullables(columns, 'head_words')
+        heads = _nullables(columns, 'heads')
+        hypernyms = [_nullables(columns, 'hypernyms_{0}'.format(depth)) for depth in self.depths]
+
+        questions = []
+        for k, text in enumerate(columns['text'].tolist()):
+            questions.append(Question.from_cache(
+                text, words[k],
+                dict((options, n[k]) for options, n in zip(self.normalizations, normalized)),
+                shapes[k], head_words[k], heads[k],
+                dict((depth, h[k]) for depth, h in zip(self.depths, hypernyms))))
+
+        return labels, questions
+
+    def save(self, f, labels, questions):
+        """Computes and stores the features of `questions`, loaded with their `labels` from the data set file `f`"""
+        columns = {
+            'labels': _strings([l.fine for l in labels]),
+            'text': _strings([q.text for q in questions]),
+        }
+        columns['tokens'], columns['token_offsets'] = _flatten([q.words for q in questions])
+        shapes, columns['shape_offsets'] = _flatten([[Question.word_shapes.index(s) for s in q.word_shape] for q in questions])
+        columns['shapes'] = shapes.astype(np.int8)
+
+        for i, options in enumerate(self.normalizations):
+            columns['normalized_{0}'.format(i)] = _strings([q.normalized(*options) for q in questions])
+
+        _add_nullables(columns, 'head_words', [q.head_word for q in questions])
+        _add_nullables(columns, 'heads', [q.head for q in questions])
+        for depth in self.depths:
+            _add_nullables(columns, 'hypernyms_{0}'.format(depth), [q.hypernym(depth) for q in questions])
+
+        # write to a temporary directory first so a partially written store is never loaded
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        tmp = tempfile.mkdtemp(dir=self.directory)
+        try:
+            for name, column in columns.iteritems():
+                np.save(os.path.join(tmp, name + '.npy'), column)
+            os.rename(tmp, self.path(f))
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(self.path(f)):     # unless another process stored it first
+                raise
+
+
+def _strings(values):
+    return np.array(values, dtype=np.unicode_) if values else np.zeros(0, dtype='U1')
+
+def _flatten(lists):
+    """Returns the concatenation of `lists` as an array and the offsets of each list in it"""
+    flat = [v for l in lists for v in l]
+    offsets = np.cumsum([0] + [len(l) for l in lists]).astype(np.int64)
+    return (_strings(flat) if flat and isinstance(flat[0], basestring) else np.array(flat, dtype=np.int64)), offsets
+
+def _unflatten(flat, offsets):
+    return [flat[offsets[k]:offsets[k + 1]] for k in xrange(len(offsets) - 1)]
+
+def _add_nullables(columns, name, values):
+    columns[name] = _strings([v if v is not None else u'' for v in values])
+    columns[name + '_missing'] = np.array([v is None for v in values], dtype=bool)
+
+def _nullables(columns, name):
+    return [None if missing else v for v, missing in zip(columns[name].tolist(), columns[name + '_missing'].tolist())]
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from question_classification import hypernyms
+from question_classification.hypernyms import HypernymTable
+
+
+class Sense(object):
+    """Noun sense with at most one hypernym"""
+
+    def __init__(self, name, hypernym=None):
+        self._name = name
+        self.hypernym = hypernym
+
+    def name(self):
+        return self._name
+
+    def hypernyms(self):
+        return [self.hypernym] if self.hypernym else []
+
+
+class Nouns(object):
+    """The calls a HypernymTable makes to WordNet, answered from a few nouns and their plurals"""
+
+    def __init__(self, senses):
+        self.senses = senses
+
+    def synsets(self, lemma, pos):
+        return self.senses.get(lemma, [])
+
+    def morphy(self, form, pos):
+        lemma = form[:-1] if form.endswith('s') else form
+        return lemma if lemma in self.senses else None
+
+    def all_lemma_names(self, pos):
+        return iter(self.senses)
+
+
+ENTITY = Sense('entity.n.01')
+CARNIVORE = Sense('carnivore.n.01', ENTITY)
+NOUNS = Nouns({
+    'dog': [Sense('dog.n.01', Sense('canine.n.02', CARNIVORE)), Sense('frump.n.01', ENTITY)],
+    'cat': [Sense('cat.n.01', Sense('feline.n.01', CARNIVORE))],
+    'entity': [ENTITY],
+})
+
+
+class HypernymTableTests(unittest.TestCase):
+    def setUp(self):
+        self.wn = hypernyms.wn
+        hypernyms.wn = NOUNS
+
+    def tearDown(self):
+        hypernyms.wn = self.wn
+
+    def test_hypernym(self):
+        table = HypernymTable()
+        self.assertEqual(['dog.n.01', 'canine.n.02', 'carnivore.n.01', 'entity.n.01'], table.chain('dog'))
+        self.assertEqual('dog.n.01', table.hypernym('dog', 0))
+        self.assertEqual('canine.n.02', table.hypernym('Dogs'))
+        self.assertEqual('carnivore.n.01', table.hypernym('cats', 2))
+
+        # past the end of the chain, the most general hypernym
+        self.assertEqual('entity.n.01', table.hypernym('dog', 3))
+        self.assertEqual('entity.n.01', table.hypernym('dog', 10))
+        self.assertEqual('entity.n.01', table.hypernym('entity', 2))
+
+        # not a noun
+        self.assertIsNone(table.hypernym('quickly'))
+        self.assertEqual([], table.chain('quickly'))
+
+    def test_build(self):
+        table = HypernymTable().build()
+        self.assertEqual(['cat', 'dog', 'entity'], table.lemmas.tolist())
+        self.assertEqual([0, 4, 8, 9], table.offsets.tolist())
+        self.assertEqual(6, len(table.synsets))     # shared by the chains
+        self.assertEqual(['cat.n.01', 'feline.n.01', 'carnivore.n.01', 'entity.n.01'], table.chain('cat'))
+        self.assertEqual({}, table._chains)
+
+    def test_save_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'hypernyms')
+            table = HypernymTable()
+            table.chain('dog')
+            table.save(path)
+
+            loaded = HypernymTable.load(path)
+            for name in ('lemmas', 'offsets', 'chains', 'synsets'):
+                self.assertIsInstance(getattr(loaded, name), np.memmap)
+                np.testing.assert_array_equal(getattr(table, name), getattr(loaded, name))
+            self.assertEqual('canine.n.02', loaded.hypernym('dogs'))
+            self.assertEqual('entity.n.01', loaded.hypernym('dog', 5))
+
+            # the chains come from the memory-mapped arrays, missing lemmas from WordNet
+            hypernyms.wn = Nouns({})
+            self.assertEqual(table.chain('dog'), loaded.chain('dog'))
+            hypernyms.wn = NOUNS
+            self.assertEqual('feline.n.01', loaded.hypernym('cat'))
+
+            # a table loaded and saved again keeps both
+            loaded.save(os.path.join(directory, 'more'))
+            reloaded = HypernymTable.load(os.path.join(directory, 'more'))
+            self.assertEqual(['cat', 'dog'], reloaded.lemmas.tolist())
+            self.assertEqual(table.chain('dog'), reloaded.chain('dog'))
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,131 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from question_classification import load
+from question_classification.question import Question
+from question_classification.load import (HeadWordExtractorPlus, TextExtractor, WordShapeExtractor, iter_batches,
+                                          iter_instances, load_instances, load_trees)
+
+
+class LoadTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.f = os.path.join(self.directory, 'questions.label')
+        self.lines = ['DESC:def What is an orange ?',
+                      'ENTY:cremat What films did Hitchcock make ?',
+                      'LOC:other Where is Canada ?',
+                      'HUM:ind Who invented the telephone ?',
+                      'NUM:date When was Canada founded ?']
+        with open(self.f, 'w') as file:
+            for line in self.lines:
+                print>>file, line
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_iter_instances(self):
+        instances = iter_instances(self.f)
+        label, question = next(instances)
+        self.assertEqual(('DESC:def', 'DESC'), (label.fine, label.coarse))
+        self.assertEqual('What is an orange ?', question.text)
+        self.assertEqual(4, len(list(instances)))
+
+        with open(os.path.join(self.directory, 'questions+heads.label'), 'w') as file:
+            for line, head in zip(self.lines, ['orange', 'films', 'Canada', 'None', 'Canada']):
+                print>>file, line, head
+        questions = [q for _, q in iter_instances(self.f, head_present=True)]
+        self.assertEqual([line.split(' ', 1)[1] for line in self.lines], [q.text for q in questions])
+        self.assertEqual('films', questions[1].head)
+
+    def test_load_instances(self):
+        labels, questions = load_instances(self.f)
+        instances = list(iter_instances(self.f))
+        self.assertEqual([l.fine for l, _ in instances], [l.fine for l in labels])
+        self.assertEqual([q.text for _, q in instances], [q.text for q in questions])
+
+    def test_load_trees(self):
+        trees = ['(S1 (SBARQ (WHNP (WP What)) (SQ (VBZ is) (NP (DT an) (NN orange))) (. ?)))',
+                 '(S1 (SBARQ (WHNP (WDT What) (NNS films)) (SQ (VBD did) (NP (NNP Hitchcock)) (VP (VB make))) (. ?)))',
+                 '(S1 (SBARQ (WHADVP (WRB Where)) (SQ (VBZ is) (NP (NNP Canada))) (. ?)))',
+                 '(S1 (SBARQ (WHNP (WP Who)) (SQ (VP (VBD invented) (NP (DT the) (NN telephone)))) (. ?)))',
+                 '(S1 (SBARQ (WHADVP (WRB When)) (SQ (VBD was) (NP (NNP Canada)) (VP (VBN founded))) (. ?)))']
+        with open(os.path.join(self.directory, 'questions+trees.label'), 'w') as file:
+            for tree in trees:
+                print>>file, tree
+
+        bank = load_trees(self.f)
+        self.assertEqual(5, len(bank))
+        self.assertEqual(('What', 'films', 'did', 'Hitchcock', 'make', '?'), bank[1].tokens())
+
+        # the heads are found from the trees
+        labels, questions = load_instances(self.f, trees_present=True)
+        self.assertEqual(['DESC:def_1', 'films', None, 'telephone', None], [q.head_word for q in questions])
+        self.assertEqual([q.text for _, q in iter_instances(self.f)], [q.text for q in questions])
+
+        # without trees, a question has no head to find
+        self.assertRaises(ValueError, getattr, Question('What films did Hitchcock make ?'), 'head_word')
+
+    def test_iter_batches(self):
+        batches = list(iter_batches(self.f, batch_size=2))
+        self.assertEqual([2, 2, 1], [len(questions) for questions, _ in batches])
+        self.assertEqual([['DESC', 'ENTY'], ['LOC', 'HUM'], ['NUM']], [targets for _, targets in batches])
+        self.assertEqual('When was Canada founded ?', batches[-1][0][0].text)
+
+        batches = list(iter_batches(self.f, WordShapeExtractor(), batch_size=5, granularity='fine'))
+        self.assertEqual(1, len(batches))
+        self.assertEqual([l.split(' ', 1)[0] for l in self.lines], batches[0][1])
+        self.assertEqual('mixed all_lower all_lower all_lower', batches[0][0][0])
+
+        self.assertEqual(5, sum(len(targets) for _, targets in iter_batches(self.f, batch_size=100)))
+
+
+class ParallelTransformTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.f = os.path.join(self.directory, 'questions.label')
+        with open(os.path.join(self.directory, 'questions+heads.label'), 'w') as file:
+            for _ in range(5):
+                print>>file, 'DESC:def What is an orange ? orange'
+                print>>file, 'ENTY:cremat What films did Hitchcock make ? films'
+                print>>file, 'LOC:other Where are the Rocky Mountains ? Mountains'
+                print>>file, 'HUM:ind Who invented the telephone ? telephone'
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def questions(self):
+        return [q for _, q in iter_instances(self.f, head_present=True)]
+
+    def test_n_jobs(self):
+        extractors = [
+            lambda n_jobs: HeadWordExtractorPlus(semantic_features=True, depth=2, n_jobs=n_jobs),
+            lambda n_jobs: WordShapeExtractor(n_jobs=n_jobs),
+            lambda n_jobs: TextExtractor(lower=True, lemmatize=True, stops=True, n_jobs=n_jobs),
+        ]
+        for extractor in extractors:
+            expected = extractor(1).transform(self.questions())
+            self.assertEqual(20, len(expected))
+            self.assertEqual(expected, extractor(2).transform(self.questions()))
+
+    def test_missing_wordnet(self):
+        class MissingWordNet(object):
+            def morphy(self, word, pos):
+                raise LookupError('wordnet')
+
+        saved = load.wn, load._loaded
+        load.wn, load._loaded = MissingWordNet(), False
+        try:
+            # only the extractors using WordNet load it, in this process
+            self.assertEqual(WordShapeExtractor().transform(self.questions()),
+                             WordShapeExtractor(n_jobs=2).transform(self.questions()))
+            self.assertRaises(LookupError, TextExtractor(lemmatize=True, n_jobs=2).transform, self.questions())
+        finally:
+            load.wn, load._loaded = saved
+
+    def test_n_jobs_validation(self):
+        for n_jobs in (None, 0, -2, 1.5):
+            self.assertRaises(ValueError, WordShapeExtractor(n_jobs=n_jobs).transform, self.questions())
@@ -1,7 +1,8 @@
 #!/usr/bin/python
 
 import unittest
-from question_classification.question import Question
+from question_classification import question
+from question_classification.question import Question, Memo
 
 
 class QuestionTests(unittest.TestCase):
@@ -75,3 +76,48 @@ class QuestionTests(unittest.TestCase):
         self.assertEqual(Question('what is a group of turkeys called ?').head_word, 'turkeys')
         self.assertEqual(Question('what year did the titanic sink ?').head_word, 'year')
         self.assertEqual(Question('what is the sales tax in Minnesota ?').head_word, 'tax')
+
+    def test_head_word_patterns(self):
+        # the general definition pattern is tried last
+        self.assertEqual(Question.patterns['set1'].keys()[-1], 'DESC:def_1')
+        self.assertEqual(len(Question.set1_placeholders), len(Question.patterns['set1']))
+
+        # set1 is case insensitive, set2 is not
+        self.assertEqual(Question('WHAT IS AN ORANGE ?').head_word, 'DESC:def_1')
+        self.assertEqual(Question('What does NASA stand for ?').head_word, 'ABBR:exp')
+
+    def test_lazy_features(self):
+        q = Question('What are Cats ?')
+        self.assertIsNone(q._words)
+        self.assertIsNone(q._normalized)
+        self.assertIsNone(q._hypernyms)
+        self.assertEqual(q.normalized(), 'what are cat')
+        self.assertEqual(q.normalized(lower=False, lemmatize=False, punct=False), 'What are Cats ?')
+        self.assertIs(q.normalized_text, q.normalized())
+        self.assertIs(q.word_shape, q.word_shape)
+        self.assertRaises(AttributeError, setattr, q, 'features', {})
+
+    def test_memo(self):
+        memo = Memo(lambda word: word.upper(), maxsize=2)
+        self.assertEqual(memo('a'), 'A')
+        self.assertEqual(memo('b'), 'B')
+        self.assertEqual(memo('a'), 'A')
+        self.assertEqual(memo('c'), 'C')    # full, so emptied before storing 'c'
+        self.assertEqual(memo.cache_info(), (1, 3, 2, 1))
+        memo('a')
+        self.assertEqual(memo.misses, 4)
+
+    def test_normalize_memo(self):
+        question.lower_lemmatized.clear()
+        self.assertEqual(Question('what are cats ?').normalized_text, 'what are cat')
+        self.assertEqual(Question('What are Cats ?').normalized_text, 'what are cat')
+        self.assertEqual((2, 6), question.lower_lemmatized.cache_info()[:2])     # keyed by the token as it appears
+
+    def test_from_cache(self):
+        q = Question.from_cache('What films ?', ['What', 'films', '?'], {(True, True, True, False): 'what film'},
+                                ['mixed', 'all_lower'], 'films', 'films', {1: 'movie.n.01'})
+        self.assertEqual(q.type, 'what')
+        self.assertEqual(q.normalized_text, 'what film')
+        self.assertEqual(q.word_shape, ['mixed', 'all_lower'])
+        self.assertEqual(q.head_word, 'films')
+        self.assertEqual(q.hypernym(1), 'movie.n.01')
@@ -0,0 +1,65 @@
+#!/usr/bin/python
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from question_classification.question import Question, Label
+from question_classification.store import FeatureStore
+
+
+class FeatureStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.f = os.path.join(self.directory, 'questions.label')
+        instances = [('DESC:def', 'What is an orange ?', 'orange'),
+                     ('ENTY:cremat', 'What films did Hitchcock make ?', 'films'),
+                     ('LOC:other', 'Where is Canada ?', 'Canada'),
+                     ('HUM:ind', 'Who invented the telephone ?', None)]
+        with open(self.f, 'w') as file:
+            for label, text, head in instances:
+                print>>file, label, text, head
+
+        self.labels = [Label(label) for label, _, _ in instances]
+        self.questions = [Question(text, head, head_present=True) for _, text, head in instances]
+
+        self.store = FeatureStore(os.path.join(self.directory, 'cache'), depths=(1, 3),
+                                  normalizations=[(True, True, True, False), (False, False, False, True)])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_load(self):
+        self.assertIsNone(self.store.load(self.f))
+        self.store.save(self.f, self.labels, self.questions)
+        labels, questions = self.store.load(self.f)
+
+        self.assertEqual([l.fine for l in self.labels], [l.fine for l in labels])
+        for expected, q in zip(self.questions, questions):
+            self.assertEqual(expected.text, q.text)
+            self.assertEqual(expected.words, q.words)
+            self.assertEqual(expected.word_shape, q.word_shape)
+            self.assertEqual(expected.normalized_text, q.normalized_text)
+            self.assertEqual(expected.normalized(False, False, False, True), q.normalized(False, False, False, True))
+            self.assertEqual(expected.head_word, q.head_word)
+            self.assertEqual(expected.head, q.head)
+            self.assertEqual(expected.hypernym(1), q.hypernym(1))
+            self.assertEqual(expected.hypernym(3), q.hypernym(3))
+
+        self.assertEqual('DESC:def_1', questions[0].head_word)
+        self.assertEqual('orange', questions[0].head)
+        self.assertIsNone(questions[3].head_word)
+        self.assertIsNone(questions[3].hypernym(1))
+
+    def test_path(self):
+        path = self.store.path(self.f)
+        self.assertEqual(path, self.store.path(self.f))
+        self.assertNotEqual(path, FeatureStore(self.store.directory, depths=(1,)).path(self.f))
+
+        with open(self.f, 'a') as file:
+            file.write('NUM:date When was Canada founded ? Canada\n')
+        self.assertNotEqual(path, self.store.path(self.f))
+
+        self.store.save(self.f, self.labels, self.questions)
+        self.assertIsNone(FeatureStore(self.store.directory, depths=(1, 2)).load(self.f))
@@ -1,8 +1,6 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-from bllipparser import Tree
-
 class AbstractCollinsHeadFinder:
     ''' A base class for a HeadFinder similar to the one described in Michael Collins' 1999 thesis '''
 
@@ -0,0 +1,63 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from head_finder import SemanticHeadFinder
+from trees import TreeBank, read_tree
+
+
+class TestTreeBank(unittest.TestCase):
+    def setUp(self):
+        self.lines = [
+            "(S1 (SBARQ (WHNP (WP What)) (SQ (VBZ is) (NP (NN autism))) (. ?)))",
+            "",
+            "(S1 (SBARQ (WHADVP (WRB Why)) (SQ (VBZ does) (NP (DT the) (NN moon)) (VP (VB turn) (NP (NN orange)))) (. ?)))",
+        ]
+        self.bank = TreeBank.read(self.lines)
+
+    def test_read(self):
+        self.assertEqual(len(self.bank), 2)
+        self.assertEqual(list(self.bank.roots), [0, 9])
+        self.assertEqual(self.bank.words[:4], ['What', 'is', 'autism', '?'])
+        self.assertEqual([str(t) for t in self.bank], [self.lines[0], self.lines[2]])
+
+    def test_tree(self):
+        tree = self.bank[0]
+        self.assertEqual(tree.label, 'S1')
+        self.assertEqual(tree.span(), (0, 4))
+        self.assertEqual(tree.tokens(), ('What', 'is', 'autism', '?'))
+        self.assertEqual(tree.tags(), ('WP', 'VBZ', 'NN', '.'))
+        self.assertFalse(tree.is_preterminal())
+        self.assertIsNone(tree.token)
+
+        sq = tree.subtrees()[0].subtrees()[1]
+        self.assertEqual([t.label for t in sq.subtrees()], ['VBZ', 'NP'])
+        self.assertEqual(sq.span(), (1, 3))
+        self.assertEqual(sq.tokens(), ('is', 'autism'))
+
+        vbz = sq.subtrees()[0]
+        self.assertTrue(vbz.is_preterminal())
+        self.assertEqual(vbz.token, 'is')
+        self.assertEqual(vbz.subtrees(), [])
+
+        # token indices are relative to the tree
+        moon = self.bank[1].subtrees()[0].subtrees()[1].subtrees()[1]
+        self.assertEqual(moon.span(), (2, 4))
+        self.assertEqual(moon.tokens(), ('the', 'moon'))
+
+    def test_read_tree(self):
+        self.assertEqual(str(read_tree("( (S (NP (NN it)) (VP (VBZ is))))")), "( (S (NP (NN it)) (VP (VBZ is))))")
+        self.assertRaises(ValueError, read_tree, "(S (NP (NN it))")
+
+    def test_determine_head(self):
+        trees = [
+            "(S1 (S (WHNP (WP What) (NN year)) (VP (VBD did) (S (NP (DT the) (NNP Titanic)) (VP (VB sink))))))",
+            "(S1 (SBARQ (WHNP (WP What) (NN county)) (SQ (VBZ is) (NP (NP (NNP Modesto)) (, ,) (NP (NNP California))) (ADVP (RB in))) (. ?)))",
+            "(S1 (SBARQ (WHNP (WRB How) (JJ tall)) (SQ (VP (VBZ is) (NP (DT the) (NNP Sears) (NNP Building)))) (. ?)))",
+            "(S1 (SBARQ (WHNP (WP What)) (SQ (VBZ is) (NP (NP (NNP Australia) (POS 's)) (JJ national) (NN flower))) (. ?)))",
+        ]
+        heads = ["year", "county", "Building", "flower"]
+
+        shf = SemanticHeadFinder()
+        self.assertEqual([shf.determine_head(t) for t in TreeBank.read(trees)], heads)
@@ -0,0 +1,194 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Trees
+
+Reader of bracketed parse trees, e.g. "(S1 (SBARQ (WHNP (WP What)) (SQ (VBZ is) (NP (NN autism))) (. ?)))",
+into a compact TreeBank: the nodes of every tree are rows of flat arrays, and trees are read through light
+views offering the interface of bllipparser.Tree used by the head finders.
+
+Example
+
+    with open('data/train_5500+trees.label') as f:
+        bank = TreeBank.read(f)     # one tree per line
+
+    SemanticHeadFinder().determine_head(bank[0])
+"""
+
+import re
+
+import numpy as np
+
+
+class TreeBank:
+    """Trees stored as arrays of nodes
+
+    Nodes of a tree are numbered in preorder, one tree after the other.
+
+    Attributes:
+        label_names ([string]): label of each label id
+        labels (np.array): label id of each node
+        spans (np.array): spans[n] is (first token, last token + 1) of node n, token indices being per tree
+        child_offsets (np.array): children of node n are children[child_offsets[n]:child_offsets[n + 1]]
+        children (np.array): node ids of the children of every node, in order
+        roots (np.array): root node of each tree
+        words ([string]): tokens of every tree, one tree after the other
+        word_offsets (np.array): tokens of tree k are words[word_offsets[k]:word_offsets[k + 1]]
+        preterminals (np.array): preterminal node of each token of `words`
+    """
+
+    TOKEN = re.compile(r'\(|\)|[^\s()]+')
+
+    def __init__(self, label_names, labels, spans, parents, roots, words, word_offsets, preterminals):
+        self.label_names = label_names
+        self.labels = labels
+        self.spans = spans
+        self.roots = roots
+        self.words = words
+        self.word_offsets = word_offsets
+        self.preterminals = preterminals
+
+        # children grouped by parent, in preorder so in order; roots have parent -1
+        order = np.argsort(parents, kind='mergesort')
+        order = order[parents[order] >= 0]
+        self.children = order.astype(np.int32)
+        self.child_offsets = np.concatenate(([0], np.cumsum(np.bincount(parents[order], minlength=len(labels)))))
+
+        self._tree_of = np.repeat(np.arange(len(roots)), np.diff(np.append(roots, len(labels))))
+
+    @classmethod
+    def read(cls, lines):
+        """
+        Reads one bracketed tree per line of `lines`
+
+        :param lines: iterable of strings, e.g. an open file. Empty lines are skipped.
+        :return: TreeBank
+        """
+        label_names, label_ids = [], {}
+        labels, starts, ends, parents, roots = [], [], [], [], []
+        words, word_offsets, preterminals = [], [0], []
+
+        for line in lines:
+            tokens = cls.TOKEN.findall(line)
+            if not tokens:
+                continue
+
+            stack = []
+            base = len(words)
+            roots.append(len(labels))
+            expect_label = False
+            for token in tokens:
+                if token == '(':
+                    node = len(labels)
+                    parents.append(stack[-1] if stack else -1)
+                    starts.append(len(words) - base)
+                    ends.append(0)
+                    labels.append(-1)
+                    stack.append(node)
+                    expect_label = True
+                    continue
+
+                node = stack[-1]
+                if expect_label:
+                    expect_label = False
+                    if token != ')':
+                        if token not in label_ids:
+                            label_ids[token] = len(label_names)
+                            label_names.append(token)
+                        labels[node] = label_ids[token]
+                        continue
+
+                if labels[node] == -1:    # unlabeled node, e.g. the root of "( (S ...))"
+                    if '' not in label_ids:
+                        label_ids[''] = len(label_names)
+                        label_names.append('')
+                    labels[node] = label_ids['']
+
+                if token == ')':
+                    ends[node] = len(words) - base
+                    stack.pop()
+                else:
+                    words.append(token)
+                    preterminals.append(node)
+
+            if stack:
+                raise ValueError("Unbalanced tree: {0}".format(line.strip()))
+            word_offsets.append(len(words))
+
+        return cls(label_names, np.array(labels, dtype=np.int32),
+                   np.array([starts, ends], dtype=np.int32).T.reshape(-1, 2),
+                   np.array(parents, dtype=np.int32), np.array(roots, dtype=np.int32),
+                   words, np.array(word_offsets, dtype=np.int64), np.array(preterminals, dtype=np.int32))
+
+    def __len__(self):
+        return len(self.roots)
+
+    def __getitem__(self, k):
+        """Returns the k-th tree of the bank"""
+        return Tree(self, int(self.roots[k]))
+
+    def __iter__(self):
+        for k in xrange(len(self)):
+            yield self[k]
+
+
+class Tree:
+    """A node of a TreeBank and the subtree it is the root of
+
+    Attributes:
+        bank (TreeBank): bank of the node
+        node (int): id of the node
+    """
+
+    def __init__(self, bank, node):
+        self.bank = bank
+        self.node = node
+
+    @property
+    def label(self):
+        return self.bank.label_names[self.bank.labels[self.node]]
+
+    @property
+    def token(self):
+        """Returns the word of a preterminal or None"""
+        tokens = self.tokens()
+        return tokens[0] if self.is_preterminal() and tokens else None
+
+    def subtrees(self):
+        """Returns the children of the node, [] for a preterminal"""
+        bank = self.bank
+        return [Tree(bank, int(c)) for c in bank.children[bank.child_offsets[self.node]:bank.child_offsets[self.node + 1]]]
+
+    def is_preterminal(self):
+        return self.bank.child_offsets[self.node] == self.bank.child_offsets[self.node + 1]
+
+    def span(self):
+        """Returns (first token, last token + 1) of the node in its tree"""
+        start, end = self.bank.spans[self.node]
+        return int(start), int(end)
+
+    def tokens(self):
+        """Returns the words of the subtree"""
+        offset = self.bank.word_offsets[self.bank._tree_of[self.node]]
+        start, end = self.span()
+        return tuple(self.bank.words[offset + start:offset + end])
+
+    def tags(self):
+        """Returns the labels of the preterminals of the subtree"""
+        bank = self.bank
+        offset = bank.word_offsets[bank._tree_of[self.node]]
+        start, end = self.span()
+        return tuple(bank.label_names[l] for l in bank.labels[bank.preterminals[offset + start:offset + end]])
+
+    def __str__(self):
+        if self.is_preterminal():
+            return "({0} {1})".format(self.label, ' '.join(self.tokens()))
+        return "({0} {1})".format(self.label, ' '.join(str(t) for t in self.subtrees()))
+
+    def __repr__(self):
+        return "Tree('{0}')".format(self)
+
+
+def read_tree(string):
+    """Returns the Tree of the bracketed tree `string`"""
+    return TreeBank.read([string])[0]
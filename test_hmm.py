@@ -0,0 +1,192 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from hmm import ArrayHMM, HMMCounts, TrigramCounts, TrigramHMM
+
+
+class TestArrayHMM(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            [('the', 'D'), ('dog', 'N'), ('runs', 'V')],
+            [('the', 'D'), ('cat', 'N')],
+            [('dogs', 'N'), ('run', 'V')],
+        ]
+        self.hmm = ArrayHMM()
+        self.hmm.train(self.data)
+
+    def test_vocabularies(self):
+        self.assertEqual(['D', 'N', 'V'], self.hmm.tags)
+        self.assertEqual([ArrayHMM.UNKNOWN, 'the', 'dog', 'runs', 'cat', 'dogs', 'run'], self.hmm.words)
+        self.assertEqual([1, 0, 6], list(self.hmm.encode(['the', 'cow', 'run'])))
+
+    def test_counts(self):
+        counts = HMMCounts().update(self.data, chunk_size=2)
+        self.assertEqual([2, 1, 0], list(counts.pi))
+        self.assertEqual([[0, 2, 0], [0, 0, 2], [0, 0, 0]], counts.a.tolist())    # no bigram across sentences
+        self.assertEqual([[0, 2, 0, 0, 0, 0, 0],
+                          [0, 0, 1, 0, 1, 1, 0],
+                          [0, 0, 0, 1, 0, 0, 1]], counts.emission_matrix().tolist())
+
+    def test_merge(self):
+        # the shards see the tags and words in another order than the whole corpus
+        data = self.data + [[('cat', 'N'), ('runs', 'V'), ('fast', 'R')], [('run', 'V')]]
+        whole = HMMCounts().update(data)
+        merged = HMMCounts().update(data[3:], chunk_size=1).merge(HMMCounts().update(data[:3], chunk_size=1))
+
+        self.assertItemsEqual(whole.tags, merged.tags)
+        self.assertItemsEqual(whole.words, merged.words)
+        t = [merged.tag_ids[tag] for tag in whole.tags]
+        w = [merged.word_ids[word] for word in whole.words]
+        self.assertEqual(whole.pi.tolist(), merged.pi[t].tolist())
+        self.assertEqual(whole.a.tolist(), merged.a[np.ix_(t, t)].tolist())
+        self.assertEqual(whole.emission_matrix().tolist(), merged.emission_matrix()[np.ix_(t, w)].tolist())
+
+    def test_parameters(self):
+        np.testing.assert_allclose(np.exp(self.hmm.PI), [2 / 3., 1 / 3., 0])
+        np.testing.assert_allclose(np.exp(self.hmm.A), [[0, 1, 0], [0, 0, 1], [0, 0, 0]])
+        np.testing.assert_allclose(np.exp(self.hmm.B[1]), [1, 0, 1 / 3., 0, 1 / 3., 1 / 3., 0])
+        self.assertEqual([0, 0, 0], list(self.hmm.B[:, 0]))     # unknown words are uninformative
+
+    def test_prob_sequence(self):
+        self.assertAlmostEqual(np.log(2 / 3.) + np.log(1 / 3.) + np.log(1 / 2.),
+                               self.hmm.prob_sequence(['D', 'N', 'V'], ['the', 'dog', 'runs']))
+        self.assertAlmostEqual(np.log(1 / 3.) + np.log(1 / 2.), self.hmm.prob_sequence(['N', 'V'], ['cow', 'run']))
+        self.assertEqual(-np.inf, self.hmm.prob_sequence(['V', 'N'], ['runs', 'dog']))
+
+    def test_save_load(self):
+        path = tempfile.mkdtemp()
+        try:
+            self.hmm.save(os.path.join(path, 'model'))
+            loaded = ArrayHMM.load(os.path.join(path, 'model'))
+
+            self.assertEqual(self.hmm.tags, loaded.tags)
+            self.assertEqual(self.hmm.words, loaded.words)
+            self.assertEqual(self.hmm.word_ids, loaded.word_ids)
+            for name in ('PI', 'A', 'B'):
+                self.assertIsInstance(getattr(loaded, name), np.memmap)
+                np.testing.assert_array_equal(getattr(self.hmm, name), getattr(loaded, name))
+            self.assertEqual(self.hmm.viterbi(['the', 'cat', 'runs']), loaded.viterbi(['the', 'cat', 'runs']))
+
+            # a loaded HMM can be re-estimated from counts but not updated
+            self.assertRaises(ValueError, loaded.partial_fit, self.data)
+            loaded.fit_counts(HMMCounts().update(self.data))
+            loaded.partial_fit(self.data)
+
+            with open(os.path.join(path, 'model', 'model.json')) as f:
+                meta = json.load(f)
+            meta['version'] = ArrayHMM.VERSION + 1
+            with open(os.path.join(path, 'model', 'model.json'), 'w') as f:
+                json.dump(meta, f)
+            self.assertRaises(ValueError, ArrayHMM.load, os.path.join(path, 'model'))
+        finally:
+            shutil.rmtree(path)
+
+
+class TestDecoding(unittest.TestCase):
+    def setUp(self):
+        # random parameters, so no two tag sequences tie, with a forbidden transition
+        random = np.random.RandomState(0)
+        self.hmm = ArrayHMM()
+        self.hmm.tags = ['A', 'B', 'C']
+        self.hmm.tag_ids = dict((t, i) for i, t in enumerate(self.hmm.tags))
+        self.hmm.words = [ArrayHMM.UNKNOWN, 'x', 'y', 'z']
+        self.hmm.word_ids = dict((w, i) for i, w in enumerate(self.hmm.words))
+        self.hmm.PI = np.log(random.dirichlet(np.ones(3)))
+        with np.errstate(divide='ignore'):
+            self.hmm.A = np.log(random.dirichlet(np.ones(3), 3) * [[1, 0, 1], [1, 1, 1], [1, 1, 1]])
+        self.hmm.B = np.log(random.dirichlet(np.ones(4), 3))
+        self.hmm.B[:, 0] = 0.0
+
+        self.sentences = [['x', 'y', 'z', 'x'], ['y'], [], ['z', 'w', 'x'], ['x', 'x', 'y', 'y', 'z'], ['w', 'y']]
+
+    def brute_force(self, words):
+        '''Returns the log-probabilities of every tag sequence of `words`'''
+        return dict((tags, self.hmm.prob_sequence(tags, words))
+                    for tags in itertools.product(self.hmm.tags, repeat=len(words)))
+
+    def test_viterbi(self):
+        for words in filter(None, self.sentences):
+            scores = self.brute_force(words)
+            best = max(scores, key=scores.get)
+
+            score, tags = self.hmm.viterbi(words)
+            self.assertEqual(list(best), tags)
+            self.assertAlmostEqual(scores[best], score)
+
+        self.assertEqual((0.0, []), self.hmm.viterbi([]))
+
+    def test_forward(self):
+        for words in filter(None, self.sentences):
+            scores = self.brute_force(words)
+            self.assertAlmostEqual(np.log(np.exp(scores.values()).sum()), self.hmm.forward(words))
+
+        self.assertEqual(0.0, self.hmm.forward([]))
+
+    def test_tag_many(self):
+        expected = [self.hmm.viterbi(words)[1] for words in self.sentences]
+        self.assertEqual(expected, self.hmm.tag_many(self.sentences, batch_size=4))
+        self.assertEqual(expected, self.hmm.tag_many(iter(self.sentences), batch_size=1))
+        self.assertEqual([[]], self.hmm.tag_many([[]]))
+        self.assertEqual([], self.hmm.tag_many([]))
+
+
+class TestTrigramHMM(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            [('the', 'D'), ('dog', 'N'), ('barked', 'V')],
+            [('a', 'D'), ('cat', 'N'), ('walked', 'V'), ('home', 'N')],
+            [('the', 'D'), ('big', 'A'), ('dog', 'N'), ('jumped', 'V')],
+            [('Rex', 'N'), ('barked', 'V')],
+            [('a', 'D'), ('small', 'A'), ('cat', 'N')],
+        ]
+        self.hmm = TrigramHMM()
+        self.hmm.train(self.data)
+
+    def trigrams(self, counts):
+        '''Returns the trigram counts of `counts` by tag names'''
+        tags = [None] + counts.tags
+        base = counts.BASE
+        return dict(((tags[k // base ** 2], tags[k // base % base], tags[k % base]), c)
+                    for k, c in zip(counts.trigrams.tolist(), counts.trigram_counts.tolist()))
+
+    def test_trigrams(self):
+        trigrams = self.trigrams(self.hmm.counts)
+        self.assertEqual(4, trigrams[None, None, 'D'])
+        self.assertEqual(2, trigrams['D', 'N', 'V'])
+        self.assertEqual(1, trigrams[None, 'N', 'V'])
+        self.assertEqual(sum(map(len, self.data)), sum(trigrams.values()))
+
+    def test_merge(self):
+        whole = TrigramCounts().update(self.data)
+        merged = TrigramCounts().update(self.data[3:]).merge(TrigramCounts().update(self.data[:3], chunk_size=1))
+
+        self.assertNotEqual(whole.tags, merged.tags)
+        self.assertEqual(self.trigrams(whole), self.trigrams(merged))
+
+    def test_lambdas(self):
+        self.assertAlmostEqual(1.0, self.hmm.lambdas.sum())
+        self.assertTrue((self.hmm.lambdas >= 0).all())
+
+    def test_viterbi(self):
+        self.assertEqual(['D', 'A', 'N', 'V'], self.hmm.viterbi(['the', 'small', 'dog', 'walked'])[1])
+        self.assertEqual((0.0, []), self.hmm.viterbi([]))
+
+    def test_unknown_words(self):
+        # tagged from the rare words sharing their suffix rather than raising a KeyError
+        score, tags = self.hmm.viterbi(['the', 'cow', 'talked'])
+        self.assertEqual(3, len(tags))
+        self.assertTrue(np.isfinite(score))
+        self.assertEqual('V', tags[2])
+
+        candidates, emissions = self.hmm._emissions('Zzyzx')
+        self.assertTrue(len(candidates))
+        self.assertTrue(np.isfinite(emissions).all())
@@ -1,8 +1,17 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+from collections import Counter, deque
+from multiprocessing import Pool
+
+import numpy as np
+from scipy import sparse
 from nltk.corpus import wordnet as wn
-from collections import Counter
+from nltk.tokenize import sent_tokenize, word_tokenize
+
+from signatures import SignatureIndex
+
+_index = None   # SignatureIndex used by indexed_lesk by default, created on first use
 
 
 def original_lesk(sentence):
@@ -16,23 +25,29 @@ def original_lesk(sentence):
     1986.
     """
     words = sentence.split(' ')
+
+    # look up the senses of each word once and count the tokens of their definitions
+    synsets = dict((w, wn.synsets(w)) for w in set(words))
+    definitions = dict((s, Counter(s.definition().split(' '))) for senses in synsets.itervalues() for s in senses)
+    contributions = dict((w, sum((definitions[s] for s in senses), Counter())) for w, senses in synsets.iteritems())
+
+    # tokens of the definitions of every word in the sentence
+    signature = Counter()
+    for w in words:
+        signature.update(contributions[w])
+
     best_sense = []    # where best_sense[i] is the best sense of word i in `sentence`
 
-    # disambiguate each word
+    # disambiguate each word against the definitions of every other word
     for word in words:
-        # Get the definitions of every other word
-        definitions = [wn.synsets(w) for w in words if w is not word]
-        signature = [val.definition() for sublist in definitions for val in sublist]
-
-        print word
-        print signature
+        own = contributions[word]
 
         best = ""
         max_overlap = 0
 
         # Compute the overlap for each sense
-        for sense in wn.synsets(word):
-            overlap = compute_overlap(sense.definition().split(' '), signature)
+        for sense in synsets[word]:
+            overlap = sum(min(count, signature[t] - own[t]) for t, count in definitions[sense].iteritems())
 
             if overlap > max_overlap:
                 max_overlap = overlap
@@ -77,6 +92,100 @@ def simple_lesk(word, sentence):
 
     return best_sense
 
+def indexed_lesk(word, sentence, index=None):
+    """Simple Lesk over precomputed signatures
+
+    Same as simple_lesk, but the signatures of the senses of `word` are read from a SignatureIndex
+    and the overlap with the context is the number of tokens they share.
+
+    :param index: SignatureIndex, a shared default index if None
+    """
+    index = index or default_index()
+
+    senses = index.signatures(word)
+    if not senses:
+        return []
+
+    context = set(index.tokens(sentence))
+
+    best_sense = senses[0][0]  # most frequent sense for word
+    max_overlap = 0
+
+    for name, signature in senses:
+        overlap = len(signature & context)
+        if overlap > max_overlap:
+            max_overlap = overlap
+            best_sense = name
+
+    return wn.synset(best_sense)
+
+def batch_lesk(sentences, index=None, as_names=False):
+    """Simple Lesk over precomputed signatures for a batch of sentences
+
+    Gives the same senses as disambiguate(sentence, indexed_lesk) for each sentence. Signatures of the senses
+    of every word of the batch are rows of a sparse term matrix, contexts are rows of another one, and the
+    overlaps of every candidate sense of every word are computed at once by multiplying them row-wise.
+
+    :param sentences: [string]
+    :param index: SignatureIndex, a shared default index if None
+    :param as_names: return the synset names of the senses, None for words without senses, rather than Synsets
+    :return: [[Synset]] best sense of each word of each sentence, [] for words without senses
+    """
+    index = index or default_index()
+    vocabulary = {}
+
+    def row(tokens):
+        return [vocabulary.setdefault(t, len(vocabulary)) for t in tokens]
+
+    def matrix(rows):
+        indices = [c for r in rows for c in r]
+        indptr = np.cumsum([0] + [len(r) for r in rows])
+        return sparse.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(rows), len(vocabulary)))
+
+    words = [sentence.split(' ') for sentence in sentences]
+    contexts = [row(set(index.tokens(sentence))) for sentence in sentences]
+
+    # one row per sense of each distinct word, most frequent sense first
+    names, signatures, first = [], [], {}
+    for word in set(w for ws in words for w in ws):
+        first[word] = len(names), len(index.signatures(word))
+        for name, signature in index.signatures(word):
+            names.append(name)
+            signatures.append(row(signature))
+
+    # candidate (occurrence, sense row) pairs
+    occurrences, candidates, sentence_ids = [], [], []
+    occurrence = 0
+    for k, ws in enumerate(words):
+        for word in ws:
+            start, count = first[word]
+            occurrences += [occurrence] * count
+            candidates += range(start, start + count)
+            sentence_ids += [k] * count
+            occurrence += 1
+
+    best = [None if as_names else [] for _ in xrange(occurrence)]
+    if candidates:
+        occurrences, candidates = np.array(occurrences), np.array(candidates)
+        scores = np.asarray(matrix(signatures)[candidates].multiply(matrix(contexts)[sentence_ids]).sum(axis=1)).ravel()
+
+        # highest overlap of each occurrence, ties going to the most frequent sense
+        order = np.lexsort((candidates, -scores, occurrences))
+        top = np.ones(len(order), dtype=bool)
+        top[1:] = occurrences[order][1:] != occurrences[order][:-1]
+        for o, c in zip(occurrences[order][top], candidates[order][top]):
+            best[o] = names[c] if as_names else wn.synset(names[c])
+
+    offsets = np.cumsum([0] + [len(ws) for ws in words])
+    return [best[offsets[k]:offsets[k + 1]] for k in xrange(len(words))]
+
+def default_index():
+    """Returns the SignatureIndex shared by the functions of this module, creating it on first use"""
+    global _index
+    if _index is None:
+        _index = SignatureIndex()
+    return _index
+
 def disambiguate(sentence, lesk=simple_lesk):
     """Disambiguates every word in `sentence` using function `lesk` """
     words = sentence.split(' ')
@@ -88,6 +197,50 @@ def disambiguate(sentence, lesk=simple_lesk):
 
     return best_sense
 
+def disambiguate_documents(documents, workers=None, index_path=None, max_in_flight=None):
+    """
+    Disambiguates every word of every document of `documents` with batch_lesk, optionally over a pool of
+    `workers` processes
+
+    Each process loads the SignatureIndex once. At most `max_in_flight` documents are sent to the pool
+    ahead of the one being yielded, so memory stays bounded however long `documents` is.
+
+    :param documents: iterable of strings, split into sentences and words with nltk
+    :param index_path: file of a SignatureIndex saved by SignatureIndex.save, the default index if None
+    :param max_in_flight: 4 documents per process by default
+    :return: generator of the synset names of each word of each sentence of each document in input order,
+        [[string or None]] per document
+    """
+    if not workers:
+        index = SignatureIndex.load(index_path) if index_path else default_index()
+        for document in documents:
+            yield _disambiguate_document(document, index)
+        return
+
+    pool = Pool(workers, _initialize, (index_path,))
+    try:
+        pending = deque()
+        for document in documents:
+            pending.append(pool.apply_async(_disambiguate_document, (document,)))
+            if len(pending) >= (max_in_flight or 4 * workers):
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+def _initialize(index_path):
+    """Loads the index of the process from `index_path`, otherwise keeps the default one (inherited on fork)"""
+    global _index
+    if index_path:
+        _index = SignatureIndex.load(index_path)
+
+def _disambiguate_document(document, index=None):
+    sentences = [' '.join(word_tokenize(s)) for s in sent_tokenize(document)]
+    return batch_lesk(sentences, index, as_names=True)
+
 def define_each(synsets):
     """Defines each synset in `synsets`"""
     return [s.definition() for s in synsets if s]
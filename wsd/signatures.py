@@ -0,0 +1,121 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Signatures
+
+Index of the Lesk signatures of WordNet senses: for every lemma, the tokens of the definition and examples
+of each of its senses. Signatures are tokenized once and kept as sets of interned tokens, so scoring a sense
+against a context is a set intersection.
+
+Example
+
+    index = SignatureIndex(stem=True, stops=True)
+    index.signatures('bank')    # [(u'bank.n.01', frozenset([...])), ...] filled on first lookup
+
+    # index every lemma of WordNet once and reuse it
+    index.build().save('signatures.pickle')
+    index = SignatureIndex.load('signatures.pickle')    # read on first lookup
+
+    disambiguate(sentence, lambda word, sentence: indexed_lesk(word, sentence, index))
+"""
+
+import cPickle as pickle
+import re
+
+from nltk.corpus import stopwords
+from nltk.corpus import wordnet as wn
+from nltk.stem.porter import PorterStemmer
+
+
+class SignatureIndex:
+    """Signatures of the senses of WordNet lemmas
+
+    Attributes:
+        stem (bool): tokens are stemmed with the Porter stemmer
+        stops (bool): English stopwords are removed
+        path (string): file the index is read from on first use or None
+    """
+
+    TOKEN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+    def __init__(self, stem=False, stops=False):
+        self.stem = stem
+        self.stops = stops
+        self.path = None
+        self._index = {}        # lemma -> [(synset name, frozenset of tokens)]
+        self._tokens = {}       # word -> interned token or None if filtered out
+        self._interned = {}     # token -> itself
+        self._stemmer = None
+        self._stopwords = None
+
+    def signatures(self, lemma):
+        """
+        Returns the senses of `lemma` along with their signature, most frequent sense first
+
+        :param lemma: string
+        :return: [(string, frozenset)] synset names and signatures, [] if `lemma` is not in WordNet
+        """
+        self._load()
+        if lemma not in self._index:
+            self._index[lemma] = [(s.name(), frozenset(self.tokens(' '.join([s.definition()] + s.examples()))))
+                                  for s in wn.synsets(lemma)]
+        return self._index[lemma]
+
+    def tokens(self, text):
+        """Returns the list of the tokens of `text`, normalized like the signatures"""
+        self._load()
+        tokens = []
+        for word in self.TOKEN.findall(text.lower()):
+            if word not in self._tokens:
+                self._tokens[word] = self._normalize(word)
+            if self._tokens[word] is not None:
+                tokens.append(self._tokens[word])
+        return tokens
+
+    def build(self):
+        """Indexes every lemma of WordNet
+
+        :return: self
+        """
+        for lemma in wn.all_lemma_names():
+            self.signatures(lemma)
+        return self
+
+    def save(self, path):
+        """Saves the lemmas indexed so far to `path`"""
+        self._load()
+        with open(path, 'wb') as f:
+            pickle.dump({'stem': self.stem, 'stops': self.stops, 'index': self._index, 'tokens': self._tokens},
+                        f, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        """Returns the index saved to `path`, which is only read on first lookup"""
+        index = cls()
+        index.path = path
+        return index
+
+    def _load(self):
+        if self.path is not None:
+            with open(self.path, 'rb') as f:
+                saved = pickle.load(f)
+            self.path = None
+            self.stem, self.stops = saved['stem'], saved['stops']
+            self._index, self._tokens = saved['index'], saved['tokens']
+            self._interned = dict((t, t) for t in self._tokens.itervalues() if t is not None)
+
+    def _normalize(self, word):
+        """Returns the interned token of `word` or None if it is a stopword"""
+        if self.stops:
+            if self._stopwords is None:
+                self._stopwords = frozenset(stopwords.words('english'))
+            if word in self._stopwords:
+                return None
+
+        if self.stem:
+            if self._stemmer is None:
+                self._stemmer = PorterStemmer()
+            word = self._stemmer.stem(word)
+
+        # the same string for every word normalizing to it, so signatures share their tokens
+        return self._interned.setdefault(word, word)
@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+
+import lesk
+import signatures
+from lesk import batch_lesk, disambiguate, disambiguate_documents, indexed_lesk, original_lesk
+from signatures import SignatureIndex
+from test_signatures import WORDNET, Stopwords
+
+
+class TestOriginalLesk(unittest.TestCase):
+    def setUp(self):
+        self.wn = lesk.wn
+        lesk.wn = WORDNET
+
+    def tearDown(self):
+        lesk.wn = self.wn
+
+    def quadratic_lesk(self, sentence):
+        """original_lesk as defined: each sense against the definitions of the senses of every other word"""
+        words = sentence.split(' ')
+        best_sense = []
+        for i, word in enumerate(words):
+            others = Counter()
+            for j, other in enumerate(words):
+                if j != i:
+                    for sense in WORDNET.synsets(other):
+                        others.update(sense.definition().split(' '))
+
+            best, max_overlap = "", 0
+            for sense in WORDNET.synsets(word):
+                overlap = sum((Counter(sense.definition().split(' ')) & others).values())
+                if overlap > max_overlap:
+                    best, max_overlap = sense, overlap
+            best_sense.append(best)
+
+        return best_sense
+
+    def test_original_lesk(self):
+        sentences = ['bank river', 'bank money', 'deposit bank money river', 'bank deposit bank',
+                     'river river', 'money', 'unknown words only', 'bank unknown river bank']
+        for sentence in sentences:
+            self.assertEqual(self.quadratic_lesk(sentence), original_lesk(sentence), sentence)
+
+    def test_overlap(self):
+        # "sloping land beside a body of water" shares 'a', 'of' and 'water' with the river
+        self.assertEqual([WORDNET.synset('bank.n.01'), WORDNET.synset('river.n.01')], original_lesk('bank river'))
+
+        # a repeated word counts as another word, but not as its own context
+        self.assertEqual([""], original_lesk('money'))
+        self.assertEqual([WORDNET.synset('money.n.01')] * 2, original_lesk('money money'))
+
+
+class TestBatchLesk(unittest.TestCase):
+    def setUp(self):
+        self.wn, self.signatures_wn, self.stopwords = lesk.wn, signatures.wn, signatures.stopwords
+        lesk.wn = signatures.wn = WORDNET
+        signatures.stopwords = Stopwords()
+        self.index = SignatureIndex(stops=True)
+
+    def tearDown(self):
+        lesk.wn, signatures.wn, signatures.stopwords = self.wn, self.signatures_wn, self.stopwords
+
+    def test_indexed_lesk(self):
+        self.assertEqual(WORDNET.synset('depository_financial_institution.n.01'),
+                         indexed_lesk('bank', 'he cashed the money', self.index))
+        self.assertEqual(WORDNET.synset('sediment.n.01'), indexed_lesk('deposit', 'matter and water', self.index))
+        self.assertEqual(WORDNET.synset('deposit.n.01'), indexed_lesk('deposit', 'bank water', self.index))  # tie
+        self.assertEqual([], indexed_lesk('unknown', 'bank water', self.index))
+
+    def test_batch_lesk(self):
+        sentences = [
+            'he cashed the money at the bank',
+            'the canoe on the bank of the river',
+            'deposit bank water',                   # tie between the senses of deposit
+            'deposit unknown',                      # no overlap for deposit, no sense for unknown
+            'matter deposit matter',
+            'unknown',
+            '',
+        ]
+        expected = [disambiguate(sentence, lambda word, sentence: indexed_lesk(word, sentence, self.index))
+                    for sentence in sentences]
+        self.assertEqual(expected, batch_lesk(sentences, self.index))
+
+        self.assertEqual(WORDNET.synset('deposit.n.01'), expected[2][0])
+        self.assertEqual([WORDNET.synset('deposit.n.01'), []], expected[3])
+        self.assertEqual(WORDNET.synset('sediment.n.01'), expected[4][1])
+        self.assertEqual([], batch_lesk([], self.index))
+
+        names = [[s.name() if s else None for s in senses] for senses in expected]
+        self.assertEqual(names, batch_lesk(sentences, self.index, as_names=True))
+
+
+class TestDisambiguateDocuments(unittest.TestCase):
+    def setUp(self):
+        # the pool processes are forked with the stubs, which also split sentences without nltk data
+        self.saved = lesk.wn, lesk.sent_tokenize, lesk.word_tokenize, signatures.wn, signatures.stopwords
+        lesk.wn = signatures.wn = WORDNET
+        lesk.sent_tokenize = lambda document: document.split(' . ')
+        lesk.word_tokenize = lambda sentence: sentence.split()
+        signatures.stopwords = Stopwords()
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'signatures.pickle')
+        SignatureIndex(stops=True).build().save(self.path)
+
+        self.documents = ['he cashed the money at the bank . the canoe on the bank of the river',
+                          'deposit bank water', 'matter deposit matter . unknown', 'river'] * 5
+
+    def tearDown(self):
+        lesk.wn, lesk.sent_tokenize, lesk.word_tokenize, signatures.wn, signatures.stopwords = self.saved
+        shutil.rmtree(self.directory)
+
+    def test_serial(self):
+        index = SignatureIndex.load(self.path)
+        expected = [[[s.name() if s else None for s in senses] for senses in batch_lesk(document.split(' . '), index)]
+                    for document in self.documents]
+        index = lesk._index
+        self.assertEqual(expected, list(disambiguate_documents(self.documents, index_path=self.path)))
+        self.assertIs(index, lesk._index)   # the default index is left alone
+        self.assertEqual([None, 'bank.n.01', 'river.n.01'], [expected[0][1][k] for k in (1, 4, 7)])    # canoe, bank, river
+
+    def test_workers(self):
+        expected = list(disambiguate_documents(self.documents, index_path=self.path))
+        self.assertEqual(expected, list(disambiguate_documents(iter(self.documents), workers=2, index_path=self.path)))
+
+    def test_max_in_flight(self):
+        consumed = []
+
+        def documents():
+            for document in self.documents:
+                consumed.append(document)
+                yield document
+
+        results = disambiguate_documents(documents(), workers=2, index_path=self.path, max_in_flight=3)
+        for k, result in enumerate(results):
+            self.assertLessEqual(len(consumed), k + 3)
+        self.assertEqual(len(self.documents), len(consumed))
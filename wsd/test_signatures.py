@@ -0,0 +1,115 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import signatures
+from signatures import SignatureIndex
+
+
+class Synset(object):
+    """Stands for a WordNet synset"""
+
+    def __init__(self, name, definition, examples=()):
+        self._name = name
+        self._definition = definition
+        self._examples = list(examples)
+
+    def name(self):
+        return self._name
+
+    def definition(self):
+        return self._definition
+
+    def examples(self):
+        return self._examples
+
+
+class WordNet(object):
+    """Stands for nltk's WordNet reader over a small table of synsets, so no WordNet data is needed"""
+
+    def __init__(self, synsets):
+        self._synsets = synsets
+
+    def synsets(self, lemma):
+        return self._synsets.get(lemma, [])
+
+    def synset(self, name):
+        return [s for senses in self._synsets.itervalues() for s in senses if s.name() == name][0]
+
+    def all_lemma_names(self):
+        return iter(self._synsets)
+
+
+class Stopwords(object):
+    def words(self, language):
+        return ['a', 'an', 'and', 'at', 'he', 'into', 'of', 'on', 'the', 'that', 'they', 'up']
+
+
+WORDNET = WordNet({
+    'bank': [Synset('bank.n.01', 'sloping land beside a body of water', ['they pulled the canoe up on the bank']),
+             Synset('depository_financial_institution.n.01',
+                    'a financial institution that accepts deposits and channels the money into lending',
+                    ['he cashed a check at the bank'])],
+    'money': [Synset('money.n.01', 'the most common medium of exchange')],
+    'river': [Synset('river.n.01', 'a large natural stream of water')],
+    'deposit': [Synset('deposit.n.01', 'money deposited in a bank'),
+                Synset('sediment.n.01', 'matter that has been deposited by water')],
+})
+
+
+class TestSignatureIndex(unittest.TestCase):
+    def setUp(self):
+        self.wn, self.stopwords = signatures.wn, signatures.stopwords
+        signatures.wn, signatures.stopwords = WORDNET, Stopwords()
+
+    def tearDown(self):
+        signatures.wn, signatures.stopwords = self.wn, self.stopwords
+
+    def test_tokens(self):
+        text = "The bank's deposits, at the river-bank"
+        self.assertEqual(['the', "bank's", 'deposits', 'at', 'the', 'river-bank'], SignatureIndex().tokens(text))
+        self.assertEqual(["bank's", 'deposits', 'river-bank'], SignatureIndex(stops=True).tokens(text))
+        self.assertEqual(['deposit', 'river-bank'], SignatureIndex(stem=True, stops=True).tokens('the deposits river-bank'))
+
+    def test_interning(self):
+        index = SignatureIndex(stem=True)
+        deposits, deposited = index.tokens('deposits deposited')
+        self.assertEqual('deposit', deposits)
+        self.assertIs(deposits, deposited)
+
+        # signatures share the tokens of the contexts
+        signature = dict(index.signatures('deposit'))['deposit.n.01']
+        self.assertIs(deposits, [t for t in signature if t == 'deposit'][0])
+
+    def test_signatures(self):
+        index = SignatureIndex(stops=True)
+        senses = index.signatures('bank')
+        self.assertEqual(['bank.n.01', 'depository_financial_institution.n.01'], [name for name, _ in senses])
+        self.assertEqual(frozenset(['sloping', 'land', 'beside', 'body', 'water', 'pulled', 'canoe', 'bank']), senses[0][1])
+        self.assertIs(senses, index.signatures('bank'))
+        self.assertEqual([], index.signatures('nothing'))
+
+    def test_save_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'signatures.pickle')
+            index = SignatureIndex(stem=True, stops=True).build()
+            index.save(path)
+
+            loaded = SignatureIndex.load(path)
+            self.assertEqual(path, loaded.path)     # not read yet
+
+            signatures.wn = WordNet({})     # the signatures come from the file
+            self.assertEqual(index.signatures('bank'), loaded.signatures('bank'))
+            self.assertIsNone(loaded.path)
+            self.assertTrue(loaded.stem and loaded.stops)
+            self.assertEqual(index.tokens('the deposits'), loaded.tokens('the deposits'))
+            self.assertEqual(index.signatures('deposit'), loaded.signatures('deposit'))
+            signature = dict(loaded.signatures('deposit'))['deposit.n.01']
+            self.assertIs(loaded.tokens('deposits')[0], [t for t in signature if t == 'deposit'][0])
+        finally:
+            shutil.rmtree(directory)